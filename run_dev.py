@@ -3,6 +3,7 @@
 Development runner for FLAN-T5 ChatBot
 """
 
+import importlib.metadata
 import sys
 import os
 from pathlib import Path
@@ -11,23 +12,13 @@ def check_dependencies():
     """Check if required dependencies are installed"""
     missing_deps = []
     
-    try:
-        import torch
-        print(f"✅ PyTorch {torch.__version__} found")
-    except ImportError:
-        missing_deps.append("torch")
-    
-    try:
-        import transformers
-        print(f"✅ Transformers {transformers.__version__} found")
-    except ImportError:
-        missing_deps.append("transformers")
-    
-    try:
-        import redis
-        print(f"✅ Redis {redis.__version__} found")
-    except ImportError:
-        missing_deps.append("redis")
+    # Read versions from package metadata; importing torch here would add
+    # seconds to every dev launch before the app even starts
+    for package, label in (("torch", "PyTorch"), ("transformers", "Transformers"), ("redis", "Redis")):
+        try:
+            print(f"✅ {label} {importlib.metadata.version(package)} found")
+        except importlib.metadata.PackageNotFoundError:
+            missing_deps.append(package)
     
     if missing_deps:
         print(f"\n❌ Missing dependencies: {', '.join(missing_deps)}")
@@ -11,10 +11,18 @@ __author__ = "Your Name"
 __email__ = "your.email@example.com"
 __description__ = "A sophisticated shell-based chat interface using Google's FLAN-T5-Large model"
 
-from .core.chat_engine import ChatEngine
-from .core.conversation_manager import ConversationManager
-from .ui.manager import UIManager
-from .config.settings import Config
+from .utils.lazy import lazy_module
+
+# Heavy components (torch, transformers, redis) are imported lazily on first
+# attribute access so that ``import flan_t5_chatbot`` stays cheap.
+_LAZY_IMPORTS = {
+    "ChatEngine": ".core.chat_engine",
+    "ConversationManager": ".core.conversation_manager",
+    "UIManager": ".ui.manager",
+    "Config": ".config.settings",
+}
+
+__getattr__, __dir__ = lazy_module(__name__, _LAZY_IMPORTS)
 
 __all__ = [
     "ChatEngine",
@@ -2,28 +2,40 @@
 Main application class for FLAN-T5 ChatBot
 """
 
+import asyncio
+import platform
 import signal
-import sys
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
-from dataclasses import dataclass
 
-import torch
-
-from .core.chat_engine import ChatEngine
 from .core.conversation_manager import ConversationManager
 from .ui.manager import UIManager
 from .config.settings import Config
 from .utils.logging import get_logger
 
+_torch = None
+
+
+def _get_torch():
+    """Import torch on first use so CLI paths that never load the model skip it"""
+    global _torch
+    if _torch is None:
+        import torch
+        _torch = torch
+    return _torch
+
 
-@dataclass
 class AppState:
     """Application state management"""
-    current_conversation_id: Optional[str] = None
-    is_running: bool = True
-    debug_mode: bool = False
-    model_loaded: bool = False
+    __slots__ = ('current_conversation_id', 'is_running', 'debug_mode', 'model_loaded')
+
+    def __init__(self, current_conversation_id: Optional[str] = None, is_running: bool = True,
+                 debug_mode: bool = False, model_loaded: bool = False):
+        self.current_conversation_id = current_conversation_id
+        self.is_running = is_running
+        self.debug_mode = debug_mode
+        self.model_loaded = model_loaded
 
 
 class FlanT5ChatBot:
@@ -39,20 +51,87 @@ class FlanT5ChatBot:
         self.conversation_manager = ConversationManager(self.config)
         self.chat_engine = None
 
+        # Model calls are serialized on a single worker
+        self._model_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model")
+        self._main_task = None
+        self._shutting_down = False
+
+        # Command dispatch table, one entry per alias
+        self._command_handlers = {}
+        for aliases, handler in (
+            (('/help', '/h'), self.ui.print_help),
+            (('/clear', '/c'), self.ui.clear_screen),
+            (('/new', '/n'), self._start_new_conversation),
+            (('/history', '/hist'), self._show_conversation_history),
+            (('/save', '/s'), self._save_conversation),
+            (('/load', '/l'), self._load_conversation),
+            (('/list',), self._list_conversations),
+            (('/search',), self._search_conversations),
+            (('/stats',), self._show_stats),
+            (('/cleanup',), self._cleanup_conversations),
+            (('/debug',), self._toggle_debug),
+            (('/quit', '/q', '/exit'), self._quit_application),
+            (('/colors',), self.ui.show_color_status),
+            (('/sysinfo',), self._show_system_info),
+        ):
+            for alias in aliases:
+                self._command_handlers[alias] = handler
+
         # Setup signal handlers
         signal.signal(signal.SIGINT, self._handle_interrupt)
         signal.signal(signal.SIGTERM, self._handle_interrupt)
 
     def _handle_interrupt(self, signum, frame):
         """Handle Ctrl+C gracefully"""
+        if self._shutting_down:
+            return
+        self._shutting_down = True
+
         self.ui.print_info("\n\nGracefully shutting down...")
         self.state.is_running = False
+
+        # The model worker is not a daemon thread and cannot be interrupted;
+        # end its beam search at the next decode step instead
+        if self.chat_engine:
+            self.chat_engine.cancel()
+
+        if self.state.model_loaded and self._main_task is not None:
+            # Wake the event loop; run() unwinds through its cleanup
+            self._main_task.get_loop().call_soon_threadsafe(self._main_task.cancel)
+        else:
+            # Model loading blocks the loop, so unwind immediately
+            raise KeyboardInterrupt
+
+    def _shutdown(self):
+        """Release resources once the main loop has stopped"""
+        self.ui.close()
+
+        # Abort any in-flight reply and let the model worker go idle before
+        # tearing down the conversation manager and the model it uses
+        if self.chat_engine:
+            self.chat_engine.cancel()
+        self._model_pool.shutdown(wait=True)
+
+        self.conversation_manager.close()
         if self.chat_engine:
             self.chat_engine.cleanup()
-        sys.exit(0)
+
+    def _warm_cuda_context(self):
+        """Create the CUDA driver context ahead of the first device transfer"""
+        try:
+            torch = _get_torch()
+            if torch.cuda.is_available():
+                torch.cuda.init()
+        except Exception as e:
+            self.logger.debug(f"CUDA pre-initialization skipped: {e}")
 
     def initialize(self) -> bool:
         """Initialize the chat engine and load model"""
+        # Driver init overlaps with importing transformers and reading weights
+        threading.Thread(target=self._warm_cuda_context, name="cuda-init", daemon=True).start()
+
+        from .core.chat_engine import ChatEngine
+
         self.ui.print_header()
         self.ui.print_info("Initializing FLAN-T5-Large model...")
 
@@ -76,6 +155,7 @@ class FlanT5ChatBot:
             if device_info.type == "mps":
                 self.ui.print_success("Using Metal Performance Shaders (Apple Silicon acceleration)")
             elif device_info.type == "cuda":
+                torch = _get_torch()
                 gpu_name = torch.cuda.get_device_name(0) if torch.cuda.is_available() else "Unknown"
                 self.ui.print_success(f"Using CUDA GPU: {gpu_name}")
             else:
@@ -88,8 +168,18 @@ class FlanT5ChatBot:
             self.logger.error(f"Model initialization failed: {str(e)}")
             return False
 
-    def run(self):
+    async def run(self):
         """Main application loop"""
+        self._main_task = asyncio.current_task()
+        try:
+            await self._run_loop()
+        except asyncio.CancelledError:
+            self.logger.info("Main loop cancelled for shutdown")
+        finally:
+            self._shutdown()
+
+    async def _run_loop(self):
+        """Initialize, then read and dispatch user input until quit"""
         if not self.initialize():
             return
 
@@ -103,7 +193,7 @@ class FlanT5ChatBot:
 
         while self.state.is_running:
             try:
-                user_input = self.ui.get_user_input()
+                user_input = await self.ui.get_user_input_async()
 
                 if not user_input.strip():
                     continue
@@ -113,7 +203,7 @@ class FlanT5ChatBot:
                     continue
 
                 # Process chat message
-                self._process_chat_message(user_input)
+                await self._process_chat_message(user_input)
 
             except KeyboardInterrupt:
                 self._handle_interrupt(None, None)
@@ -126,50 +216,40 @@ class FlanT5ChatBot:
 
     def _handle_command(self, user_input: str) -> bool:
         """Handle special commands"""
-        command = user_input.strip().lower()
-
-        command_handlers = {
-            ('/help', '/h'): self.ui.print_help,
-            ('/clear', '/c'): self.ui.clear_screen,
-            ('/new', '/n'): self._start_new_conversation,
-            ('/history', '/hist'): self._show_conversation_history,
-            ('/save', '/s'): self._save_conversation,
-            ('/load', '/l'): self._load_conversation,
-            ('/list',): self._list_conversations,
-            ('/search',): self._search_conversations,
-            ('/stats',): self._show_stats,
-            ('/cleanup',): self._cleanup_conversations,
-            ('/debug',): self._toggle_debug,
-            ('/quit', '/q', '/exit'): self._quit_application,
-            ('/colors',): self.ui.show_color_status,
-            ('/sysinfo',): self._show_system_info,
-        }
-
-        for commands, handler in command_handlers.items():
-            if command in commands:
-                if command in ('/quit', '/q', '/exit'):
-                    handler()
-                else:
-                    handler()
-                return True
+        command = user_input.strip()
+
+        # Plain chat messages are the common case
+        if not command.startswith('/'):
+            return False
+
+        command = command.lower()
 
-        # Handle commands with parameters
+        handler = self._command_handlers.get(command)
+        if handler is not None:
+            handler()
+            return True
+
+        # Handle commands with parameters; the stripped command cannot end in
+        # a space, so the query is never empty here
         if command.startswith('/search '):
-            query = user_input[8:].strip()
-            self._search_conversations(query)
+            self._search_conversations(user_input.strip()[8:].lstrip())
             return True
 
         return False
 
-    def _process_chat_message(self, user_input: str):
+    async def _process_chat_message(self, user_input: str):
         """Process a chat message"""
         if not self.state.current_conversation_id:
             self.ui.print_error("No active conversation")
             return
 
-        # Add user message to conversation
+        loop = asyncio.get_running_loop()
+        conversation_id = self.state.current_conversation_id
+
+        # Add user message to conversation; the background writer persists it
+        # while the model generates
         self.conversation_manager.add_message(
-            self.state.current_conversation_id,
+            conversation_id,
             "user",
             user_input
         )
@@ -179,12 +259,12 @@ class FlanT5ChatBot:
 
         try:
             # Get conversation context
-            context = self.conversation_manager.get_conversation_context(
-                self.state.current_conversation_id
-            )
+            context = self.conversation_manager.get_conversation_context(conversation_id)
 
-            # Generate response
-            response = self.chat_engine.generate_response(user_input, context)
+            # Generate response off the event loop
+            response = await loop.run_in_executor(
+                self._model_pool, self.chat_engine.generate_response, user_input, context
+            )
 
             # Stop typing indicator
             self.ui.stop_typing_indicator()
@@ -194,7 +274,7 @@ class FlanT5ChatBot:
 
             # Add assistant response to conversation
             self.conversation_manager.add_message(
-                self.state.current_conversation_id,
+                conversation_id,
                 "assistant",
                 response
             )
@@ -270,10 +350,13 @@ class FlanT5ChatBot:
             self.ui.print_info("No conversations found")
             return
 
-        self.ui.print_info(f"Found {len(conversations)} conversations:")
+        lines = [f"Found {len(conversations)} conversations:"]
         for conv in conversations:
-            updated = datetime.fromisoformat(conv['updated_at']).strftime("%Y-%m-%d %H:%M")
-            self.ui.print_info(f"• {conv['title']} ({conv['message_count']} messages, updated: {updated})")
+            updated = conv['updated_at'][:16].replace('T', ' ')
+            lines.append(f"• {conv['title']} ({conv['message_count']} messages, updated: {updated})")
+
+        # One write for the whole listing
+        self.ui.print_info_lines(lines)
 
     def _search_conversations(self, query: str = None):
         """Search conversations"""
@@ -289,10 +372,12 @@ class FlanT5ChatBot:
             self.ui.print_info(f"No conversations found matching '{query}'")
             return
 
-        self.ui.print_info(f"Found {len(results)} conversations matching '{query}':")
+        lines = [f"Found {len(results)} conversations matching '{query}':"]
         for result in results:
-            updated = datetime.fromisoformat(result['updated_at']).strftime("%Y-%m-%d %H:%M")
-            self.ui.print_info(f"• {result['title']} ({result['message_count']} messages, updated: {updated})")
+            updated = result['updated_at'][:16].replace('T', ' ')
+            lines.append(f"• {result['title']} ({result['message_count']} messages, updated: {updated})")
+
+        self.ui.print_info_lines(lines)
 
     def _show_stats(self):
         """Show storage statistics"""
@@ -323,8 +408,6 @@ class FlanT5ChatBot:
 
     def _show_system_info(self):
         """Show system information"""
-        import platform
-
         self.ui.print_info("System Information:")
         self.ui.print_info(f"• Platform: {platform.system()} {platform.release()}")
         self.ui.print_info(f"• Architecture: {platform.machine()}")
@@ -335,7 +418,7 @@ class FlanT5ChatBot:
             self.ui.print_info(f"• AI Device: {device}")
 
             if device.type == "cuda":
-                import torch
+                torch = _get_torch()
                 if torch.cuda.is_available():
                     self.ui.print_info(f"• GPU: {torch.cuda.get_device_name(0)}")
                     self.ui.print_info(f"• CUDA Version: {torch.version.cuda}")
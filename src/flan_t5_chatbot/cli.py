@@ -4,13 +4,11 @@ Command Line Interface for FLAN-T5 ChatBot
 """
 
 import argparse
+import asyncio
 import sys
 import os
 from pathlib import Path
 
-from .app import FlanT5ChatBot
-from .config.settings import Config
-from .utils.logging import setup_logging
 from . import __version__
 
 
@@ -70,11 +68,24 @@ Examples:
     return parser
 
 
+def _install_event_loop_policy():
+    """Use uvloop for the asyncio event loop when it is available"""
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
 def main():
     """Main entry point for the CLI"""
     parser = create_parser()
     args = parser.parse_args()
     
+    # Deferred so that --help/--version exit before torch is imported
+    from .app import FlanT5ChatBot
+    from .utils.logging import setup_logging
+    
     try:
         # Setup logging
         logger = setup_logging(
@@ -95,7 +106,8 @@ def main():
             no_color=args.no_color
         )
         
-        chatbot.run()
+        _install_event_loop_policy()
+        asyncio.run(chatbot.run())
         
     except KeyboardInterrupt:
         print("\n\nGoodbye! 👋")
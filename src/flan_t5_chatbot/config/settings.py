@@ -5,9 +5,14 @@ Configuration management for FLAN-T5 ChatBot
 import json
 import os
 from typing import Dict, Any, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, fields, replace
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from ..utils.logging import get_logger
 
 
@@ -16,11 +21,18 @@ class ModelConfig:
     """Model configuration"""
     name: str = "google/flan-t5-large"
     max_length: int = 512
+    min_length: int = 256  # shortest reply, in tokens
     temperature: float = 0.7
     top_p: float = 0.9
     top_k: int = 50
     repetition_penalty: float = 1.2
+    length_penalty: float = 1.4
+    num_beams: int = 16
     do_sample: bool = True
+    compile: bool = True  # torch.compile the model on CUDA
+    compile_mode: str = "default"  # "default" | "reduce-overhead" | "max-autotune"
+    enable_cuda_graph: bool = False  # replay decode steps from CUDA graphs (needs compile)
+    force_fp32: bool = False  # disable bf16/fp16 weights
 
 
 @dataclass
@@ -50,8 +62,10 @@ class RedisConfig:
     decode_responses: bool = True
     socket_timeout: int = 5
     socket_connect_timeout: int = 5
+    socket_keepalive: bool = True
     retry_on_timeout: bool = True
     health_check_interval: int = 30
+    max_connections: int = 32
 
 
 class Config:
@@ -69,6 +83,10 @@ class Config:
         self.log_level = "INFO"
         self.use_redis = True
         
+        # Memoized get_default_config() result and the state it was built from
+        self._cached_default = None
+        self._cached_default_sig = None
+        
         # Load configuration if file exists
         self.load_config()
     
@@ -76,41 +94,16 @@ class Config:
         """Load configuration from file"""
         if self.config_path.exists():
             try:
-                with open(self.config_path, 'r') as f:
-                    config_data = json.load(f)
-                
-                # Update model config
-                if 'model' in config_data:
-                    for key, value in config_data['model'].items():
-                        if hasattr(self.model, key):
-                            setattr(self.model, key, value)
-                
-                # Update UI config
-                if 'ui' in config_data:
-                    for key, value in config_data['ui'].items():
-                        if hasattr(self.ui, key):
-                            setattr(self.ui, key, value)
-                
-                # Update conversation config
-                if 'conversation' in config_data:
-                    for key, value in config_data['conversation'].items():
-                        if hasattr(self.conversation, key):
-                            setattr(self.conversation, key, value)
-                
-                # Update Redis config
-                if 'redis' in config_data:
-                    for key, value in config_data['redis'].items():
-                        if hasattr(self.redis, key):
-                            setattr(self.redis, key, value)
+                stat = self.config_path.stat()
+                if self._load_config_cache(stat):
+                    self.logger.info(f"Loaded configuration from {self.config_path} (cached)")
+                    return
                 
-                # Update other settings
-                if 'log_level' in config_data:
-                    self.log_level = config_data['log_level']
-                
-                if 'use_redis' in config_data:
-                    self.use_redis = config_data['use_redis']
+                raw = self.config_path.read_bytes()
+                self._apply_config_data(orjson.loads(raw) if orjson else json.loads(raw))
                 
                 self.logger.info(f"Loaded configuration from {self.config_path}")
+                self._save_config_cache(stat)
                     
             except Exception as e:
                 self.logger.warning(f"Could not load config file: {e}")
@@ -119,38 +112,142 @@ class Config:
             self.logger.info("Config file not found, using defaults")
             self.save_config()  # Create default config file
     
-    def save_config(self):
-        """Save current configuration to file"""
+    def _apply_config_data(self, config_data: Dict[str, Any]):
+        """Apply a parsed configuration dictionary on top of the current settings"""
+        # Update nested configs
+        self.model = self._merge_section(self.model, config_data.get('model'))
+        self.ui = self._merge_section(self.ui, config_data.get('ui'))
+        self.conversation = self._merge_section(self.conversation, config_data.get('conversation'))
+        self.redis = self._merge_section(self.redis, config_data.get('redis'))
+        
+        # Update other settings
+        if 'log_level' in config_data:
+            self.log_level = config_data['log_level']
+        
+        if 'use_redis' in config_data:
+            self.use_redis = config_data['use_redis']
+    
+    @property
+    def cache_path(self) -> Path:
+        """Path of the config cache kept next to the config file"""
+        return self.config_path.with_name(f".{self.config_path.stem}.cache.json")
+    
+    def _cache_key(self, stat: os.stat_result) -> list:
+        """Key identifying the config file contents and the settings schema"""
+        # Lists rather than tuples so the key compares equal after a JSON round trip;
+        # field defaults are part of the schema so changing one invalidates the cache
+        schema = [
+            [[f.name, f.default] for f in fields(section)]
+            for section in (ModelConfig, UIConfig, ConversationConfig, RedisConfig)
+        ]
+        return [stat.st_mtime_ns, stat.st_size, schema]
+    
+    def _load_config_cache(self, stat: os.stat_result) -> bool:
+        """Restore settings from the cache if it matches the config file"""
         try:
+            # Plain JSON data, rebuilt into the dataclasses below, so a
+            # tampered cache file can at worst hold wrong settings
+            raw = self.cache_path.read_bytes()
+            cached = orjson.loads(raw) if orjson else json.loads(raw)
+            
+            if cached.get('key') != self._cache_key(stat):
+                return False
+            
+            self._apply_config_data(cached['settings'])
+            return True
+            
+        except Exception:
+            return False
+    
+    def _save_config_cache(self, stat: os.stat_result):
+        """Write the parsed settings to the cache"""
+        try:
+            cached = {
+                'key': self._cache_key(stat),
+                'settings': self.get_default_config()
+            }
+            encoded = orjson.dumps(cached) if orjson else json.dumps(cached).encode('utf-8')
+            self.cache_path.write_bytes(encoded)
+        except Exception as e:
+            self.logger.debug(f"Could not write config cache: {e}")
+    
+    @staticmethod
+    def _merge_section(section, values: Optional[Dict[str, Any]]):
+        """Return a copy of a config section updated with its known keys"""
+        if not values:
+            return section
+        names = {f.name for f in fields(section)}
+        return replace(section, **{k: v for k, v in values.items() if k in names})
+    
+    def _encode_config(self) -> bytes:
+        """Serialize the configuration to JSON bytes"""
+        if orjson:
+            # orjson serializes dataclasses natively, without asdict() copies
             config_data = {
-                'model': asdict(self.model),
-                'ui': asdict(self.ui),
-                'conversation': asdict(self.conversation),
-                'redis': asdict(self.redis),
+                'model': self.model,
+                'ui': self.ui,
+                'conversation': self.conversation,
+                'redis': self.redis,
                 'log_level': self.log_level,
                 'use_redis': self.use_redis
             }
+            return orjson.dumps(config_data, option=orjson.OPT_INDENT_2)
+        
+        return json.dumps(self.get_default_config(), indent=2).encode('utf-8')
+    
+    def save_config(self):
+        """Save current configuration to file"""
+        try:
+            encoded = self._encode_config()
+            
+            # Nothing to do if the file already holds this configuration
+            try:
+                if self.config_path.read_bytes() == encoded:
+                    self.logger.debug(f"Configuration unchanged, not rewriting {self.config_path}")
+                    return
+            except OSError:
+                pass
             
             # Ensure parent directory exists
             self.config_path.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(self.config_path, 'w') as f:
-                json.dump(config_data, f, indent=2)
+            # Write to a temporary file and swap it in so an interrupted
+            # write never leaves a truncated config behind
+            tmp_path = self.config_path.with_name(self.config_path.name + '.tmp')
+            tmp_path.write_bytes(encoded)
+            os.replace(tmp_path, self.config_path)
             
             self.logger.info(f"Saved configuration to {self.config_path}")
                 
         except Exception as e:
             self.logger.warning(f"Could not save config file: {e}")
     
+    def _config_signature(self) -> tuple:
+        """Cheap snapshot of the current settings used to validate the memo"""
+        sections = tuple(
+            (id(section), tuple(vars(section).values()))
+            for section in (self.model, self.ui, self.conversation, self.redis)
+        )
+        return (sections, self.log_level, self.use_redis)
+    
     def get_default_config(self) -> Dict[str, Any]:
         """Get default configuration as dictionary"""
+        signature = self._config_signature()
+        if self._cached_default is None or signature != self._cached_default_sig:
+            self._cached_default = {
+                'model': asdict(self.model),
+                'ui': asdict(self.ui),
+                'conversation': asdict(self.conversation),
+                'redis': asdict(self.redis),
+                'log_level': self.log_level,
+                'use_redis': self.use_redis
+            }
+            self._cached_default_sig = signature
+        
+        # Copy the section dicts so callers cannot mutate the memo
         return {
-            'model': asdict(self.model),
-            'ui': asdict(self.ui),
-            'conversation': asdict(self.conversation),
-            'redis': asdict(self.redis),
-            'log_level': self.log_level,
-            'use_redis': self.use_redis
+            key: dict(value) if isinstance(value, dict) else value
+            for key, value in self._cached_default.items()
         }
     
     def update_config(self, **kwargs):
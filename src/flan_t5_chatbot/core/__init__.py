@@ -2,8 +2,16 @@
 Core components for FLAN-T5 ChatBot
 """
 
-from .chat_engine import ChatEngine
-from .conversation_manager import ConversationManager
 from .models import Message, Conversation
+from ..utils.lazy import lazy_module
 
-__all__ = ["ChatEngine", "ConversationManager", "Message", "Conversation"]
+# ChatEngine pulls in torch/transformers, so it is only imported when used
+_LAZY_IMPORTS = {
+    "ChatEngine": ".chat_engine",
+    "BatchedChatEngine": ".batched_engine",
+    "ConversationManager": ".conversation_manager",
+}
+
+__all__ = ["ChatEngine", "BatchedChatEngine", "ConversationManager", "Message", "Conversation"]
+
+__getattr__, __dir__ = lazy_module(__name__, _LAZY_IMPORTS)
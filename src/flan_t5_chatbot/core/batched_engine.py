@@ -0,0 +1,88 @@
+"""
+Batched Chat Engine - Coalesces concurrent requests into shared generate() calls
+"""
+
+import asyncio
+from concurrent.futures import Executor
+from typing import List, Dict, Optional, Tuple
+
+from ..utils.logging import get_logger
+
+
+class BatchedChatEngine:
+    """Async front end that micro-batches requests to a ChatEngine"""
+
+    def __init__(self, engine, executor: Optional[Executor] = None,
+                 max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        self.engine = engine
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.logger = get_logger(__name__)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def generate_response(self, user_input: str, context: List[Dict] = None) -> str:
+        """Queue a request and wait for its response"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._batch_loop())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((user_input, context), future))
+        return await future
+
+    async def _collect_batch(self) -> List[Tuple[Tuple[str, Optional[List[Dict]]], asyncio.Future]]:
+        """Wait for one request, then gather more for up to max_wait"""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _batch_loop(self):
+        """Run queued requests through the engine batch by batch"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = await self._collect_batch()
+            requests = [request for request, _ in batch]
+            self.logger.debug(f"Generating batch of {len(requests)} requests")
+
+            try:
+                responses = await loop.run_in_executor(
+                    self.executor, self.engine.generate_responses, requests
+                )
+            except Exception as e:
+                self.logger.error(f"Batched generation failed: {e}")
+                responses = [self.engine.ERROR_RESPONSE] * len(batch)
+
+            for (_, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+
+    async def close(self):
+        """Stop the batching task and fail any requests still queued"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.cancel()
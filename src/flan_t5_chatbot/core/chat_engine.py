@@ -3,14 +3,68 @@ Chat Engine - Core AI processing using FLAN-T5-Large
 """
 
 import torch
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-from typing import List, Dict, Optional
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, LogitsProcessor, LogitsProcessorList
+from transformers import StoppingCriteria, StoppingCriteriaList
+from transformers import GenerationConfig as HFGenerationConfig
+from transformers.modeling_outputs import BaseModelOutput
+from typing import List, Dict, Optional, Tuple
+from collections import OrderedDict
+import copy
 from dataclasses import dataclass
+import gc
+import hashlib
 import platform
+import re
+import threading
 
 from ..utils.logging import get_logger
 
 
+# Instruction fragments the model sometimes echoes back
+SKIP_PHRASES = (
+    "You are a helpful AI assistant",
+    "Please respond naturally",
+    "Previous conversation:",
+    "respond to the following message",
+)
+
+# One case-insensitive scan per line instead of one per phrase
+_SKIP_RE = re.compile("|".join(re.escape(phrase) for phrase in SKIP_PHRASES), re.IGNORECASE)
+
+
+class TensorNoRepeatNGramProcessor(LogitsProcessor):
+    """Ban repeated n-grams using tensor ops that stay on the device"""
+
+    def __init__(self, ngram_size: int):
+        self.ngram_size = ngram_size
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        n = self.ngram_size
+        length = input_ids.shape[1]
+        if length < n:
+            return scores
+
+        # All n-grams generated so far, shape (rows, positions, n)
+        ngrams = input_ids.unfold(1, n, 1)
+        current = input_ids[:, length - (n - 1):]
+        matches = (ngrams[:, :, :-1] == current.unsqueeze(1)).all(dim=-1)
+
+        # Tokens that would complete an n-gram already seen in the row
+        banned = torch.zeros_like(scores, dtype=torch.int32)
+        banned.scatter_add_(1, ngrams[:, :, -1], matches.to(torch.int32))
+        return scores.masked_fill(banned > 0, -float("inf"))
+
+
+class CancelledCriteria(StoppingCriteria):
+    """Stop generation once an event is set, ending every row"""
+
+    def __init__(self, event: threading.Event):
+        self.event = event
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        return torch.full((input_ids.shape[0],), self.event.is_set(), dtype=torch.bool, device=input_ids.device)
+
+
 @dataclass
 class GenerationConfig:
     """Configuration for text generation"""
@@ -20,6 +74,8 @@ class GenerationConfig:
     top_p: float = 0.9
     top_k: int = 50
     repetition_penalty: float = 1.2
+    length_penalty: float = 1.0
+    num_beams: int = 1
     do_sample: bool = True
     early_stopping: bool = True
 
@@ -27,6 +83,31 @@ class GenerationConfig:
 class ChatEngine:
     """Core chat engine using FLAN-T5-Large"""
 
+    # Prompt lengths are padded up to one of these so captured CUDA graphs
+    # are replayed instead of re-recorded for every new length
+    CUDA_GRAPH_BUCKETS = (64, 128, 256, 512)
+
+    # torch.compile modes that capture CUDA graphs
+    CUDA_GRAPH_COMPILE_MODES = ("reduce-overhead", "max-autotune")
+
+    # Prompt length groups used by generate_responses
+    BATCH_BUCKETS = (128, 256, 512)
+
+    # Number of encoded prompts kept for reuse
+    ENCODER_CACHE_SIZE = 16
+
+    # Number of tokenized prompt segments (role markers, recent messages) kept
+    SEGMENT_CACHE_SIZE = 256
+
+    # Upper bound on reply length; below it the token budget grows with the
+    # prompt so short questions do not reserve the full decode budget
+    MAX_NEW_TOKENS = 1024
+
+    ERROR_RESPONSE = (
+        "I apologize, but I'm having trouble generating a response right now. "
+        "Could you please try rephrasing your question?"
+    )
+
     def __init__(self, config):
         self.config = config
         self.logger = get_logger(__name__)
@@ -35,6 +116,21 @@ class ChatEngine:
         self.device = self._detect_optimal_device()
         self.generation_config = GenerationConfig()
         self.max_context_length = 512
+        self._eager_forward = None
+        self._use_cuda_graph = False
+        self._encoder_cache: "OrderedDict[bytes, torch.Tensor]" = OrderedDict()
+        self._segment_cache: "OrderedDict[str, List[int]]" = OrderedDict()
+        self._static_inputs: Dict[str, torch.Tensor] = {}
+        self._generate_lock = threading.Lock()
+        self._hf_generation_config: Optional[HFGenerationConfig] = None
+
+        # Stands in for no_repeat_ngram_size=2, whose HF implementation keeps
+        # per-row Python dicts of seen n-grams and updates them every step
+        self._logits_processors = LogitsProcessorList([TensorNoRepeatNGramProcessor(2)])
+
+        # Set by cancel() so an interrupt ends the beam search at the next step
+        self._cancelled = threading.Event()
+        self._stopping_criteria = StoppingCriteriaList([CancelledCriteria(self._cancelled)])
 
         self.logger.info(f"Initializing ChatEngine on device: {self.device}")
 
@@ -76,10 +172,11 @@ class ChatEngine:
 
         self.logger.info(f"Loading model: {model_name}")
 
-        # Load tokenizer
+        # Load tokenizer; the Rust-backed fast tokenizer releases the GIL
         self.tokenizer = AutoTokenizer.from_pretrained(
             model_name,
-            legacy=False
+            legacy=False,
+            use_fast=True
         )
 
         # Set pad token to eos token to avoid attention mask issues
@@ -87,16 +184,9 @@ class ChatEngine:
             self.tokenizer.pad_token = self.tokenizer.eos_token
 
         # Determine dtype based on device
-        if self.device.type == "cuda":
-            dtype = torch.float16
-            device_map = "auto"
-        elif self.device.type == "mps":
-            # MPS works better with float32 for T5 models
-            dtype = torch.float32
-            device_map = None
-        else:
-            dtype = torch.float32
-            device_map = None
+        dtype = self._select_dtype()
+        device_map = "auto" if self.device.type == "cuda" else None
+        self.logger.info(f"Using dtype: {dtype}")
 
         # Load model
         self.model = AutoModelForSeq2SeqLM.from_pretrained(
@@ -111,109 +201,373 @@ class ChatEngine:
 
         self.model.eval()
 
+        # Persistent device buffers single prompts are copied into, so the
+        # hot path does not allocate device memory for its inputs
+        if self.device.type == "cuda":
+            self._static_inputs = {
+                name: torch.zeros((1, self.max_context_length), dtype=torch.long, device=self.device)
+                for name in ("input_ids", "attention_mask")
+            }
+
+        # Compile the forward pass; the warmup below absorbs the compile cost
+        self._compile_model()
+
+        # CUDA graphs need the compiled forward and a fixed-size KV cache
+        self._use_cuda_graph = (
+            self._eager_forward is not None
+            and self._compile_mode() in self.CUDA_GRAPH_COMPILE_MODES
+        )
+
         # Update generation config from settings
         self._update_generation_config()
+        self._hf_generation_config = self._build_hf_generation_config()
 
         # Warm up the model
         self._warmup_model()
 
         self.logger.info("Model loaded and warmed up successfully")
 
+    def _select_dtype(self):
+        """Pick the narrowest dtype the device runs T5 well in"""
+        if self.config.model.force_fp32:
+            return torch.float32
+
+        if self.device.type == "cuda":
+            # Ampere+ has native bf16, which avoids the fp16 overflow T5 is prone to
+            major, _ = torch.cuda.get_device_capability()
+            return torch.bfloat16 if major >= 8 else torch.float16
+
+        if self.device.type == "mps":
+            try:
+                torch.ones(1, dtype=torch.bfloat16, device=self.device)
+                return torch.bfloat16
+            except Exception:
+                return torch.float32
+
+        # Only worth it on CPUs with bf16 instructions; otherwise it is emulated
+        bf16_checks = (
+            getattr(torch.cpu, "_is_avx512_bf16_supported", None),
+            getattr(torch.cpu, "_is_amx_tile_supported", None),
+        )
+        if any(check is not None and check() for check in bf16_checks):
+            return torch.bfloat16
+        return torch.float32
+
     def _update_generation_config(self):
         """Update generation config from settings"""
         model_config = self.config.model
         self.generation_config.max_length = model_config.max_length
+        self.generation_config.min_length = model_config.min_length
         self.generation_config.temperature = model_config.temperature
         self.generation_config.top_p = model_config.top_p
         self.generation_config.top_k = model_config.top_k
         self.generation_config.repetition_penalty = model_config.repetition_penalty
+        self.generation_config.length_penalty = model_config.length_penalty
+        self.generation_config.num_beams = model_config.num_beams
         self.generation_config.do_sample = model_config.do_sample
 
-    def _warmup_model(self):
-        """Warm up the model with a simple query"""
-        self.logger.debug("Warming up model...")
+    def _build_hf_generation_config(self) -> HFGenerationConfig:
+        """Build the decoding settings passed to generate() once, up front"""
+        generation = self.generation_config
+        settings = dict(
+            min_length=generation.min_length,
+            length_penalty=generation.length_penalty,
+            num_beams=generation.num_beams,
+            repetition_penalty=generation.repetition_penalty,
+            do_sample=generation.do_sample,
+            early_stopping=generation.early_stopping,
+            use_cache=True,
+            pad_token_id=self.tokenizer.pad_token_id,
+            eos_token_id=self.tokenizer.eos_token_id
+        )
+        # Sampling parameters are only valid (and only used) when sampling
+        if generation.do_sample:
+            settings.update(
+                temperature=generation.temperature,
+                top_k=generation.top_k,
+                top_p=generation.top_p
+            )
+
+        # Start from the model's own config so decoder_start_token_id and
+        # friends stay set, then apply the configured decoding strategy
+        config = copy.deepcopy(self.model.generation_config)
+        config.update(**settings)
+        config.validate()
+        return config
 
+    def _compile_mode(self) -> str:
+        """torch.compile mode to use for the model forward"""
+        model_config = self.config.model
+        # Graph-capturing modes only pay off with the static KV cache; with a
+        # growing dynamic cache every decode step would capture a new graph
+        if model_config.compile_mode in self.CUDA_GRAPH_COMPILE_MODES and not model_config.enable_cuda_graph:
+            return "default"
+        return model_config.compile_mode
+
+    def _compile_model(self):
+        """Wrap the model forward with torch.compile when enabled"""
+        model_config = self.config.model
+        if not model_config.compile or self.device.type != "cuda":
+            return
+
+        version = tuple(int(part) for part in torch.__version__.split(".")[:2] if part.isdigit())
+        if version < (2, 1):
+            self.logger.info(f"torch.compile requires PyTorch 2.1+, found {torch.__version__}")
+            return
+
+        mode = self._compile_mode()
         try:
-            warmup_prompt = "Answer the following question: What is 2+2?"
-
-            inputs = self.tokenizer(
-                warmup_prompt,
-                return_tensors="pt",
-                max_length=100,
-                truncation=True,
-                padding=True,
-                return_attention_mask=True
+            self._eager_forward = self.model.forward
+            # dynamic=True avoids recompiling for every prompt length
+            self.model.forward = torch.compile(
+                self.model.forward,
+                mode=mode,
+                fullgraph=False,
+                dynamic=True
             )
+            self.logger.info(f"Compiled model forward (mode={mode})")
+        except Exception as e:
+            self.logger.warning(f"torch.compile failed, using eager model: {e}")
+            self._restore_eager_forward()
+
+    def _restore_eager_forward(self):
+        """Undo torch.compile and go back to the eager forward"""
+        if self._eager_forward is not None:
+            self.model.forward = self._eager_forward
+            self._eager_forward = None
+        self._use_cuda_graph = False
+
+    def _decode_kwargs(self) -> Dict:
+        """Extra generate() arguments for the CUDA graph decode path"""
+        if not self._use_cuda_graph:
+            return {}
+        # A static KV cache keeps decode shapes fixed, letting the
+        # reduce-overhead compile capture each step once and replay it
+        return {"cache_implementation": "static"}
+
+    def _bucket_inputs(self, inputs):
+        """Pad tokenized inputs up to the nearest CUDA graph bucket"""
+        if not self._use_cuda_graph:
+            return inputs
+        length = inputs['input_ids'].shape[-1]
+        bucket = next((b for b in self.CUDA_GRAPH_BUCKETS if b >= length), length)
+        return self.tokenizer.pad(inputs, padding="max_length", max_length=bucket, return_tensors="pt")
+
+    def _to_device(self, inputs) -> Dict[str, torch.Tensor]:
+        """Move tokenized tensors to the model device"""
+        if self.device.type == "cuda":
+            return {k: self._stage_input(k, v) for k, v in inputs.items()}
+        return {k: v.to(self.device) for k, v in inputs.items()}
 
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-
-            with torch.no_grad():
-                _ = self.model.generate(
-                    input_ids=inputs['input_ids'],
-                    attention_mask=inputs['attention_mask'],
-                    max_new_tokens=10,
-                    temperature=0.7,
-                    do_sample=True,
-                    pad_token_id=self.tokenizer.pad_token_id,
-                    eos_token_id=self.tokenizer.eos_token_id
-                )
+    def _stage_input(self, name: str, tensor: torch.Tensor) -> torch.Tensor:
+        """Copy a host tensor to the GPU, reusing the static buffer when it fits"""
+        # Copies from pinned host memory are asynchronous and queue up
+        # behind earlier work on the stream instead of blocking the CPU
+        host = tensor.pin_memory()
+
+        # Callers hold _generate_lock, so a buffer never serves two requests at once
+        buffer = self._static_inputs.get(name)
+        if buffer is None or host.shape[0] != 1 or host.shape[1] > buffer.shape[1]:
+            return host.to(self.device, non_blocking=True)
+
+        view = buffer[:, :host.shape[1]]
+        view.copy_(host, non_blocking=True)
+        return view
+
+    def _warmup_model(self):
+        """Warm up the model with a few queries of increasing length"""
+        self.logger.debug("Warming up model...")
+
+        # Several lengths so a compiled model specializes prefill and decode
+        # shapes before the first real request
+        warmup_prompts = (
+            "What is 2+2?",
+            "Answer the following question: What is the capital of France?",
+            "Summarize in one sentence: The quick brown fox jumps over the lazy dog "
+            "while the farmer watches from the porch of the old wooden house.",
+        )
+
+        try:
+            # Same path and generation config as real requests (beam width,
+            # encoder_outputs, cache implementation), so the shapes compiled
+            # here are the ones generate_response will hit
+            for warmup_prompt in warmup_prompts:
+                self._generate(self._bucket_inputs(self._tokenize_prompt(warmup_prompt)))
 
             self.logger.debug("Model warmup completed")
         except Exception as e:
             self.logger.warning(f"Model warmup failed: {e}")
+        finally:
+            # Warmup prompts should not take up encoder cache slots
+            self._encoder_cache.clear()
 
     def generate_response(self, user_input: str, context: List[Dict] = None) -> str:
         """Generate response using FLAN-T5"""
         try:
             self.logger.debug(f"Generating response for input: {user_input[:50]}...")
 
-            # Prepare the prompt with context
-            prompt = self._prepare_prompt(user_input, context)
-
-            # Tokenize input
-            inputs = self.tokenizer(
-                prompt,
-                return_tensors="pt",
-                # max_length=self.max_context_length,
-                # truncation=True,
-                # padding=True,
-                # return_attention_mask=True
-            )
+            # Tokenize the prompt with context
+            inputs = self._tokenize_prompt(user_input, context)
 
-            # inputs = {k: v.to(self.device) for k, v in inputs.items()}
-            input_ids = inputs.input_ids.to(self.device)
-            # Generate response
-            with torch.no_grad():
-                outputs = self.model.generate(
-                    input_ids=input_ids,
-                    min_length=256,
-                    max_new_tokens=1024,
-                    length_penalty=1.4,
-                    num_beams=16,
-                    no_repeat_ngram_size=2,
-                    temperature=0.7,
-                    top_k=150,
-                    top_p=0.92,
-                    repetition_penalty=2.1,
-                    early_stopping=True
-                )
-
-            # Decode response
-            response = self.tokenizer.batch_decode(
-                outputs,
-                skip_special_tokens=True,
-                clean_up_tokenization_spaces=True
-            )[0]
+            response = self._generate(self._bucket_inputs(inputs))[0]
 
             # Post-process response
-            response = self._post_process_response(response, prompt)
+            response = self._post_process_response(response)
 
             self.logger.debug(f"Generated response: {response[:50]}...")
             return response
 
         except Exception as e:
             self.logger.error(f"Error generating response: {str(e)}")
-            return "I apologize, but I'm having trouble generating a response right now. Could you please try rephrasing your question?"
+            return self.ERROR_RESPONSE
+
+    def generate_responses(self, requests: List[Tuple[str, Optional[List[Dict]]]]) -> List[str]:
+        """Generate responses for several (user_input, context) pairs at once"""
+        prompts = [self._prepare_prompt(user_input, context) for user_input, context in requests]
+        responses = [self.ERROR_RESPONSE] * len(prompts)
+
+        # Group prompts by length so padding waste within a batch stays bounded
+        lengths = [len(ids) for ids in self.tokenizer(prompts)['input_ids']]
+        buckets: Dict[int, List[int]] = {}
+        for index, length in enumerate(lengths):
+            bucket = next((b for b in self.BATCH_BUCKETS if b >= length), length)
+            buckets.setdefault(bucket, []).append(index)
+
+        for indices in buckets.values():
+            try:
+                inputs = self.tokenizer(
+                    [prompts[i] for i in indices],
+                    return_tensors="pt",
+                    padding=True,
+                    return_attention_mask=True
+                )
+                decoded = self._generate(self._bucket_inputs(inputs))
+                for i, response in zip(indices, decoded):
+                    responses[i] = self._post_process_response(response)
+            except Exception as e:
+                self.logger.error(f"Error generating batched responses: {str(e)}")
+
+        return responses
+
+    def _generate(self, inputs) -> List[str]:
+        """Run the model over a tokenized batch and decode every row"""
+        cache_key = self._encoder_cache_key(inputs)
+
+        # One generation at a time: the model and the static input buffers
+        # are shared by every caller
+        with self._generate_lock:
+            inputs = self._to_device(inputs)
+
+            # Keep cyclic GC from pausing the decode loop; the pending collection
+            # runs once generation is over and GC is re-enabled
+            gc_was_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                try:
+                    return self._run_generate(cache_key, inputs)
+                except Exception as e:
+                    if self._eager_forward is None:
+                        raise
+                    # Compilation errors only surface on the first call with a
+                    # new shape; drop the compiled forward and retry eagerly
+                    self.logger.warning(f"Compiled model failed, using eager model: {e}")
+                    self._restore_eager_forward()
+                    return self._run_generate(cache_key, inputs)
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
+
+    def _run_generate(self, cache_key: bytes, inputs) -> List[str]:
+        """Encode, decode and detokenize a batch already on the device"""
+        input_ids = inputs['input_ids']
+        # Unpadded single prompts carry no mask; the model treats that as all ones
+        attention_mask = inputs.get('attention_mask')
+        # Generate response
+        with torch.no_grad():
+            # The encoder state is fixed for the whole request, so run it
+            # once here rather than inside generate()
+            encoder_outputs = self._encode(cache_key, input_ids, attention_mask)
+
+            outputs = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                encoder_outputs=encoder_outputs,
+                generation_config=self._hf_generation_config,
+                # Only the length budget changes from call to call
+                max_new_tokens=self._max_new_tokens(input_ids, attention_mask),
+                logits_processor=self._logits_processors,
+                stopping_criteria=self._stopping_criteria,
+                **self._decode_kwargs()
+            )
+
+        # Decode response
+        return self.tokenizer.batch_decode(
+            outputs,
+            skip_special_tokens=True,
+            clean_up_tokenization_spaces=True
+        )
+
+    def _max_new_tokens(self, input_ids, attention_mask) -> int:
+        """Decode budget for a batch, scaled to its longest real prompt"""
+        # The static cache is sized from max_new_tokens, so on the CUDA graph
+        # path the budget follows the padded bucket length; one budget per
+        # bucket keeps the captured graphs reusable
+        if attention_mask is None or self._use_cuda_graph:
+            prompt_tokens = input_ids.shape[-1]
+        else:
+            prompt_tokens = int(attention_mask.sum(dim=-1).max())
+        # Room for the configured minimum reply plus two tokens per prompt
+        # token, so the budget grows with every prompt rather than only
+        # once the prompt outgrows a fixed floor
+        return min(self.MAX_NEW_TOKENS, self.generation_config.min_length + 2 * prompt_tokens)
+
+    @staticmethod
+    def _encoder_cache_key(inputs) -> bytes:
+        """Hash the token ids and mask of a tokenized batch"""
+        digest = hashlib.blake2b(digest_size=16)
+        for name in ('input_ids', 'attention_mask'):
+            tensor = inputs.get(name)
+            if tensor is None:
+                continue
+            digest.update(name.encode())
+            digest.update(repr(tuple(tensor.shape)).encode())
+            digest.update(tensor.cpu().numpy().tobytes())
+        return digest.digest()
+
+    def _encode(self, cache_key: bytes, input_ids, attention_mask) -> BaseModelOutput:
+        """Run the encoder, reusing the states of recently seen prompts"""
+        hidden_states = self._encoder_cache.get(cache_key)
+        if hidden_states is not None:
+            self._encoder_cache.move_to_end(cache_key)
+            self.logger.debug("Encoder cache hit")
+        else:
+            hidden_states = self.model.get_encoder()(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                return_dict=True
+            ).last_hidden_state
+            self._encoder_cache[cache_key] = hidden_states
+            if len(self._encoder_cache) > self.ENCODER_CACHE_SIZE:
+                self._encoder_cache.popitem(last=False)
+
+        # generate() expands encoder outputs for beam search in place, so it
+        # always gets a fresh wrapper around the cached tensor
+        return BaseModelOutput(last_hidden_state=hidden_states)
+
+    def _context_turns(self, context: List[Dict] = None) -> List[Tuple[str, str]]:
+        """Role marker and content of the recent messages used as context"""
+        if not context:
+            return []
+
+        # Get last few messages for context
+        recent_context = context[-4:] if len(context) > 4 else context
+        markers = {"user": "User:", "assistant": "Assistant:"}
+
+        return [
+            (markers[msg["role"]], msg["content"])
+            for msg in recent_context
+            if msg["role"] in markers
+        ]
 
     def _prepare_prompt(self, user_input: str, context: List[Dict] = None) -> str:
         """Prepare the prompt with context for FLAN-T5"""
@@ -221,31 +575,71 @@ class ChatEngine:
         # FLAN-T5 works best with clear instruction formats
         # Build context if available
         context_str = ""
-        if context and len(context) > 0:
-            # Get last few messages for context
-            recent_context = context[-4:] if len(context) > 4 else context
-            context_parts = []
-
-            for msg in recent_context:
-                if msg["role"] == "user":
-                    context_parts.append(f"User: {msg['content']}")
-                elif msg["role"] == "assistant":
-                    context_parts.append(f"Assistant: {msg['content']}")
-
-            if context_parts:
-                context_str = "Previous conversation:\n" + "\n".join(context_parts) + "\n\n"
+        context_parts = [f"{marker} {content}" for marker, content in self._context_turns(context)]
+        if context_parts:
+            context_str = "Previous conversation:\n" + "\n".join(context_parts) + "\n\n"
 
         # Create the instruction prompt
         prompt = f"{context_str}User: {user_input}\nAssistant:"
 
         return prompt
 
-    def _post_process_response(self, response: str, original_prompt: str) -> str:
+    def _segment_ids(self, text: str) -> List[int]:
+        """Token ids of one prompt segment, cached across turns"""
+        ids = self._segment_cache.get(text)
+        if ids is not None:
+            self._segment_cache.move_to_end(text)
+            return ids
+
+        ids = self.tokenizer(text, add_special_tokens=False)['input_ids']
+        self._segment_cache[text] = ids
+        if len(self._segment_cache) > self.SEGMENT_CACHE_SIZE:
+            self._segment_cache.popitem(last=False)
+        return ids
+
+    def _tokenize_prompt(self, user_input: str, context: List[Dict] = None) -> Dict[str, torch.Tensor]:
+        """Tokenize the prompt built by _prepare_prompt from cached segments"""
+        # T5's tokenizer splits on whitespace before SentencePiece and every
+        # segment boundary is whitespace, so the joined ids match tokenizing
+        # the whole prompt; markers and earlier messages come from the cache
+        limit = self.max_context_length
+        user_marker = self._segment_ids("User:")
+        suffix = self._segment_ids("Assistant:") + [self.tokenizer.eos_token_id]
+
+        # A message longer than the encoder window on its own keeps its start
+        message = self._segment_ids(user_input)
+        room = limit - len(user_marker) - len(suffix)
+        if len(message) > room:
+            message = message[:max(room, 0)]
+        tail = user_marker + message + suffix
+
+        # Keep the newest context turns that still fit, dropping the oldest
+        header = self._segment_ids("Previous conversation:")
+        budget = limit - len(tail) - len(header)
+        kept: List[List[int]] = []
+        for marker, content in reversed(self._context_turns(context)):
+            turn = self._segment_ids(marker) + self._segment_ids(content)
+            if len(turn) > budget:
+                break
+            kept.append(turn)
+            budget -= len(turn)
+
+        ids: List[int] = []
+        if kept:
+            ids.extend(header)
+            for turn in reversed(kept):
+                ids.extend(turn)
+        ids.extend(tail)
+
+        input_ids = torch.tensor([ids], dtype=torch.long)
+        return {"input_ids": input_ids}
+
+    def _post_process_response(self, response: str) -> str:
         """Post-process the generated response"""
 
-        # Remove the original prompt from response if it appears
-        if original_prompt in response:
-            response = response.replace(original_prompt, "").strip()
+        # No need to strip the prompt: FLAN-T5's decoder generates a fresh
+        # sequence rather than continuing the encoder input, so the decoded
+        # output never contains it (unlike decoder-only GPT-style models)
 
         # Clean up common artifacts
         lines = response.split('\n')
@@ -265,14 +659,7 @@ class ChatEngine:
                 continue  # Skip user lines in response
 
             # Skip lines that are just instruction repetitions
-            skip_phrases = [
-                "You are a helpful AI assistant",
-                "Please respond naturally",
-                "Previous conversation:",
-                "respond to the following message"
-            ]
-
-            if not any(phrase.lower() in line.lower() for phrase in skip_phrases):
+            if not _SKIP_RE.search(line):
                 cleaned_lines.append(line)
 
         # Join the cleaned lines
@@ -294,10 +681,20 @@ class ChatEngine:
             if hasattr(self.generation_config, key):
                 setattr(self.generation_config, key, value)
                 self.logger.debug(f"Updated generation config: {key} = {value}")
+            # Keep the prebuilt generate() settings in sync
+            if self._hf_generation_config is not None and hasattr(self._hf_generation_config, key):
+                setattr(self._hf_generation_config, key, value)
+
+    def cancel(self):
+        """Stop the running generation and any later ones; used on shutdown"""
+        self._cancelled.set()
 
     def cleanup(self):
         """Cleanup resources"""
         self.logger.info("Cleaning up ChatEngine resources")
+        self._encoder_cache.clear()
+        self._segment_cache.clear()
+        self._static_inputs = {}
         if self.model:
             del self.model
         if self.tokenizer:
@@ -312,5 +709,4 @@ class ChatEngine:
                 torch.mps.empty_cache()
 
         # General cleanup
-        import gc
         gc.collect()
@@ -3,31 +3,46 @@ Conversation Manager - Handle conversation history and context with Redis suppor
 """
 
 import json
+import queue
+import threading
 import uuid
 import os
+from collections import deque
 from datetime import datetime
 from typing import List, Dict, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 from pathlib import Path
 
 from .models import Message, Conversation
 from ..utils.logging import get_logger
-from ..data.redis_store import RedisConversationStore
 from ..data.file_store import FileConversationStore
 
 
 class ConversationManager:
-    """Manages conversations and message history with Redis support"""
+    """Manages conversations and message history with Redis support
+
+    Writes are handed to a background thread which coalesces queued saves
+    and persists them in batches, so ``add_message`` returns without
+    waiting on storage. Call ``flush`` before reading from storage.
+    """
+    
+    WRITE_BATCH_SIZE = 32
+    WRITE_BATCH_WAIT = 0.005  # seconds to wait for more writes to coalesce
     
     def __init__(self, config):
         self.config = config
         self.logger = get_logger(__name__)
         self.conversations: Dict[str, Conversation] = {}
         
+        # Last max_context_messages messages of each conversation, kept
+        # alongside the full history so building the prompt never slices it
+        self._context_tails: Dict[str, "deque[Message]"] = {}
+        
         # Initialize storage backend
         self.storage = None
         if config.use_redis:
             try:
+                from ..data.redis_store import RedisConversationStore
                 self.storage = RedisConversationStore(config)
                 self.logger.info("Using Redis for conversation storage")
             except Exception as e:
@@ -37,6 +52,76 @@ class ConversationManager:
         else:
             self.storage = FileConversationStore(config)
             self.logger.info("Using file storage for conversations")
+        
+        # Background writer
+        self._lock = threading.Lock()
+        self._write_queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._writer = threading.Thread(
+            target=self._write_loop, name="conversation-writer", daemon=True
+        )
+        self._writer.start()
+    
+    def _write_loop(self):
+        """Drain queued saves and persist them in batches"""
+        while True:
+            batch = [self._write_queue.get()]
+            while len(batch) < self.WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._write_queue.get(timeout=self.WRITE_BATCH_WAIT))
+                except queue.Empty:
+                    break
+            
+            try:
+                # Several queued saves of one conversation collapse into one write
+                conversation_ids = [cid for cid in dict.fromkeys(batch) if cid is not None]
+                snapshots = []
+                with self._lock:
+                    for cid in conversation_ids:
+                        conversation = self.conversations.get(cid)
+                        if conversation:
+                            snapshots.append(replace(conversation, messages=list(conversation.messages)))
+                
+                if snapshots and not self.storage.save_conversations(snapshots):
+                    self.logger.error(f"Failed to persist {len(snapshots)} queued conversation(s)")
+            except Exception as e:
+                self.logger.error(f"Conversation writer error: {e}")
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+            
+            if None in batch:
+                return
+    
+    def _queue_save(self, conversation_id: str):
+        """Schedule a conversation to be persisted by the background writer"""
+        self._write_queue.put(conversation_id)
+    
+    def _remember(self, conversation: Conversation):
+        """Keep a conversation in memory, dropping any stale context tail"""
+        with self._lock:
+            self.conversations[conversation.id] = conversation
+            self._context_tails.pop(conversation.id, None)
+    
+    def _context_tail(self, conversation_id: str) -> "deque[Message]":
+        """Return the context window of a conversation, building it if needed"""
+        tail = self._context_tails.get(conversation_id)
+        if tail is None:
+            maxlen = self.config.conversation.max_context_messages
+            messages = self.conversations[conversation_id].messages
+            tail = deque(messages[-maxlen:] if maxlen else (), maxlen=maxlen)
+            self._context_tails[conversation_id] = tail
+        return tail
+    
+    def flush(self):
+        """Block until all queued saves have been written"""
+        if self._writer.is_alive():
+            self._write_queue.join()
+    
+    def close(self):
+        """Flush pending saves and stop the background writer"""
+        if self._writer.is_alive():
+            self._write_queue.put(None)
+            self._writer.join()
     
     def create_conversation(self, title: str = None) -> str:
         """Create a new conversation"""
@@ -54,23 +139,18 @@ class ConversationManager:
             updated_at=timestamp
         )
         
-        self.conversations[conversation_id] = conversation
+        with self._lock:
+            self.conversations[conversation_id] = conversation
         
         # Save to storage
-        self.storage.save_conversation(conversation)
+        self._queue_save(conversation_id)
         
         self.logger.info(f"Created new conversation: {conversation_id}")
         return conversation_id
     
     def add_message(self, conversation_id: str, role: str, content: str, metadata: Dict = None) -> str:
         """Add a message to a conversation"""
-        if conversation_id not in self.conversations:
-            # Try to load from storage
-            conversation = self.storage.load_conversation(conversation_id)
-            if conversation:
-                self.conversations[conversation_id] = conversation
-            else:
-                raise ValueError(f"Conversation {conversation_id} not found")
+        conversation = self.conversations.get(conversation_id) or self._load_or_raise(conversation_id)
         
         message_id = str(uuid.uuid4())
         timestamp = datetime.now().isoformat()
@@ -83,22 +163,32 @@ class ConversationManager:
             metadata=metadata or {}
         )
         
-        self.conversations[conversation_id].messages.append(message)
-        self.conversations[conversation_id].updated_at = timestamp
+        with self._lock:
+            conversation.messages.append(message)
+            conversation.updated_at = timestamp
+            self._context_tail(conversation_id).append(message)
         
         # Save to storage
-        self.storage.save_conversation(self.conversations[conversation_id])
+        self._queue_save(conversation_id)
         
         self.logger.debug(f"Added {role} message to conversation {conversation_id}")
         return message_id
     
+    def _load_or_raise(self, conversation_id: str) -> Conversation:
+        """Load a conversation from storage into memory or raise ValueError"""
+        conversation = self.storage.load_conversation(conversation_id)
+        if not conversation:
+            raise ValueError(f"Conversation {conversation_id} not found")
+        self._remember(conversation)
+        return conversation
+    
     def get_conversation_messages(self, conversation_id: str) -> List[Message]:
         """Get all messages from a conversation"""
         if conversation_id not in self.conversations:
             # Try to load from storage
             conversation = self.storage.load_conversation(conversation_id)
             if conversation:
-                self.conversations[conversation_id] = conversation
+                self._remember(conversation)
             else:
                 return []
         
@@ -106,54 +196,66 @@ class ConversationManager:
     
     def get_conversation_context(self, conversation_id: str, max_messages: int = None) -> List[Dict]:
         """Get conversation context for AI model"""
+        default_window = self.config.conversation.max_context_messages
         if max_messages is None:
-            max_messages = self.config.conversation.max_context_messages
+            max_messages = default_window
             
         messages = self.get_conversation_messages(conversation_id)
+        if not messages:
+            return []
         
         # Get recent messages for context
-        recent_messages = messages[-max_messages:] if len(messages) > max_messages else messages
+        if max_messages == default_window:
+            with self._lock:
+                recent_messages = list(self._context_tail(conversation_id))
+        else:
+            recent_messages = messages[-max_messages:] if len(messages) > max_messages else messages
         
         # Convert to simple dict format
-        context = []
-        for msg in recent_messages:
-            context.append({
+        return [
+            {
                 "role": msg.role,
                 "content": msg.content,
                 "timestamp": msg.timestamp
-            })
-        
-        return context
+            }
+            for msg in recent_messages
+        ]
     
     def save_conversation(self, conversation_id: str, filename: str = None) -> bool:
         """Save a conversation (legacy method for compatibility)"""
         if conversation_id not in self.conversations:
             return False
         
+        self.flush()
         return self.storage.save_conversation(self.conversations[conversation_id])
     
     def load_conversation(self, conversation_id: str) -> bool:
         """Load a conversation from storage"""
+        self.flush()
         conversation = self.storage.load_conversation(conversation_id)
         if conversation:
-            self.conversations[conversation.id] = conversation
+            self._remember(conversation)
             self.logger.info(f"Loaded conversation: {conversation_id}")
             return True
         return False
     
     def list_conversations(self, limit: int = 50, offset: int = 0) -> List[Dict]:
         """List all conversations"""
+        self.flush()
         return self.storage.list_conversations(limit, offset)
     
     def search_conversations(self, query: str, limit: int = 20) -> List[Dict]:
         """Search conversations"""
+        self.flush()
         return self.storage.search_conversations(query, limit)
     
     def delete_conversation(self, conversation_id: str) -> bool:
         """Delete a conversation"""
+        self.flush()
         # Remove from memory
-        if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
+        with self._lock:
+            self.conversations.pop(conversation_id, None)
+            self._context_tails.pop(conversation_id, None)
         
         # Remove from storage
         success = self.storage.delete_conversation(conversation_id)
@@ -168,7 +270,7 @@ class ConversationManager:
         if conversation_id not in self.conversations:
             conversation = self.storage.load_conversation(conversation_id)
             if conversation:
-                self.conversations[conversation_id] = conversation
+                self._remember(conversation)
             else:
                 return "Conversation not found"
         
@@ -184,8 +286,10 @@ class ConversationManager:
     
     def get_storage_stats(self) -> Dict:
         """Get storage statistics"""
+        self.flush()
         return self.storage.get_conversation_stats()
     
     def cleanup_old_conversations(self, days: int = 30) -> int:
         """Clean up old conversations"""
+        self.flush()
         return self.storage.cleanup_old_conversations(days)
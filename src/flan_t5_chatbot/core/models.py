@@ -2,21 +2,25 @@
 Data models for FLAN-T5 ChatBot
 """
 
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 
+# __slots__ dataclasses need Python 3.10+; older interpreters keep __dict__
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_DATACLASS_OPTIONS)
 class Message:
     """Represents a single message in a conversation"""
     id: str
     role: str  # 'user' or 'assistant'
     content: str
     timestamp: str
-    metadata: Dict = None
+    metadata: Optional[Dict] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Conversation:
     """Represents a complete conversation"""
     id: str
@@ -24,4 +28,4 @@ class Conversation:
     messages: List[Message]
     created_at: str
     updated_at: str
-    metadata: Dict = None
+    metadata: Optional[Dict] = field(default_factory=dict)
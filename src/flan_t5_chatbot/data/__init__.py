@@ -2,7 +2,14 @@
 Data storage components for FLAN-T5 ChatBot
 """
 
-from .redis_store import RedisConversationStore
 from .file_store import FileConversationStore
+from ..utils.lazy import lazy_module
+
+# The Redis store requires the redis client library, so import it on demand
+_LAZY_IMPORTS = {
+    "RedisConversationStore": ".redis_store",
+}
 
 __all__ = ["RedisConversationStore", "FileConversationStore"]
+
+__getattr__, __dir__ = lazy_module(__name__, _LAZY_IMPORTS)
@@ -4,11 +4,17 @@ File-based conversation storage (fallback when Redis is not available)
 
 import json
 import os
-from datetime import datetime
+import sqlite3
+import threading
+from datetime import datetime, timedelta
 from typing import List, Dict, Optional
-from dataclasses import asdict
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from ..core.models import Message, Conversation
 from ..utils.logging import get_logger
 
@@ -16,177 +22,382 @@ from ..utils.logging import get_logger
 class FileConversationStore:
     """File-based conversation storage"""
     
+    # Each conversation is an append-only JSONL log of "meta" records (the
+    # last one wins) and one "msg" record per message; index.db keeps
+    # per-conversation summaries and message text for listing and search.
+    
+    # Appended meta records allowed before a log is rewritten compactly
+    COMPACT_AFTER = 64
+    
     def __init__(self, config):
         self.config = config
         self.logger = get_logger(__name__)
         self.data_dir = Path(config.conversation.save_directory)
+        self.index_path = self.data_dir / "index.db"
         self._ensure_data_directory()
+        
+        # conversation id -> (messages on disk, meta records appended since compaction)
+        self._persisted: Dict[str, List[int]] = {}
+        self._lock = threading.RLock()
+        
+        self._fts = False
+        self._db = self._open_index()
     
     def _ensure_data_directory(self):
         """Ensure the conversations directory exists"""
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.logger.debug(f"Conversations directory: {self.data_dir}")
     
+    def _log_path(self, conversation_id: str) -> Path:
+        """Path of a conversation's JSONL log"""
+        return self.data_dir / f"conversation_{conversation_id}.jsonl"
+    
+    def _legacy_path(self, conversation_id: str) -> Path:
+        """Path of a conversation saved as a single JSON document"""
+        return self.data_dir / f"conversation_{conversation_id}.json"
+    
+    @staticmethod
+    def _encode_line(record: Dict) -> bytes:
+        """Serialize one log record as a compact JSON line"""
+        if orjson:
+            return orjson.dumps(record) + b"\n"
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode('utf-8') + b"\n"
+    
+    @staticmethod
+    def _decode(data: bytes):
+        """Parse JSON bytes"""
+        return orjson.loads(data) if orjson else json.loads(data)
+    
+    @staticmethod
+    def _message_record(message: Message) -> Dict:
+        """Log record for one message, built without asdict()'s deep copy"""
+        return {
+            "type": "msg",
+            "id": message.id,
+            "role": message.role,
+            "content": message.content,
+            "timestamp": message.timestamp,
+            "metadata": message.metadata
+        }
+    
+    @staticmethod
+    def _meta_record(conversation: Conversation) -> Dict:
+        """Log record holding everything but the messages"""
+        return {
+            "type": "meta",
+            "id": conversation.id,
+            "title": conversation.title,
+            "created_at": conversation.created_at,
+            "updated_at": conversation.updated_at,
+            "metadata": conversation.metadata
+        }
+    
+    def _open_index(self) -> sqlite3.Connection:
+        """Open the SQLite index, building it from the files if it is new"""
+        db = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        with db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS conv ("
+                "id TEXT PRIMARY KEY, title TEXT, created_at TEXT, updated_at TEXT, "
+                "msg_count INTEGER, size INTEGER)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS conv_updated_at ON conv (updated_at)")
+        
+        # The trigram tokenizer lets LIKE '%query%' use the full-text index
+        try:
+            with db:
+                db.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS conv_fts "
+                    "USING fts5(conv_id UNINDEXED, content, tokenize='trigram')"
+                )
+            self._fts = True
+        except sqlite3.OperationalError as e:
+            self.logger.warning(f"SQLite full-text search unavailable, searching files instead: {e}")
+        
+        (indexed,) = db.execute("SELECT COUNT(*) FROM conv").fetchone()
+        if not indexed:
+            self._rebuild_index(db)
+        
+        return db
+    
+    def _rebuild_index(self, db: sqlite3.Connection):
+        """Index every conversation file in the data directory"""
+        count = 0
+        for filepath in self._conversation_files():
+            try:
+                if filepath.suffix == ".jsonl":
+                    conversation = self._read_log(filepath)
+                else:
+                    conversation = self._read_legacy(filepath)
+                if conversation is not None:
+                    self._index_conversation(db, conversation, filepath, conversation.messages, rewrite=True)
+                    count += 1
+            except Exception as e:
+                self.logger.warning(f"Error reading conversation file {filepath}: {e}")
+        
+        if count:
+            self.logger.info(f"Built conversation index with {count} entries")
+    
+    def _index_conversation(self, db: sqlite3.Connection, conversation: Conversation,
+                            filepath: Path, new_messages: List[Message], rewrite: bool):
+        """Record a conversation and its new message text in the index"""
+        with db:
+            db.execute(
+                "INSERT OR REPLACE INTO conv VALUES (?, ?, ?, ?, ?, ?)",
+                (conversation.id, conversation.title, conversation.created_at,
+                 conversation.updated_at, len(conversation.messages), filepath.stat().st_size)
+            )
+            if self._fts:
+                if rewrite:
+                    db.execute("DELETE FROM conv_fts WHERE conv_id = ?", (conversation.id,))
+                db.executemany(
+                    "INSERT INTO conv_fts (conv_id, content) VALUES (?, ?)",
+                    [(conversation.id, message.content) for message in new_messages]
+                )
+    
     def save_conversation(self, conversation: Conversation) -> bool:
         """Save conversation to file"""
         try:
-            filename = f"conversation_{conversation.id}.json"
-            filepath = self.data_dir / filename
-            
-            # Convert to serializable format
-            data = {
-                "conversation": asdict(conversation),
-                "export_timestamp": datetime.now().isoformat(),
-                "version": "1.0"
-            }
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with self._lock:
+                filepath = self._log_path(conversation.id)
+                state = self._persisted.get(conversation.id)
+                message_count = len(conversation.messages)
+                
+                if (state is None or state[0] > message_count or state[1] >= self.COMPACT_AFTER
+                        or not filepath.exists()):
+                    self._write_log(conversation)
+                    self._index_conversation(self._db, conversation, filepath,
+                                             conversation.messages, rewrite=True)
+                else:
+                    # Only the messages added since the last save hit the disk
+                    new_messages = conversation.messages[state[0]:]
+                    lines = [
+                        self._encode_line(self._message_record(message))
+                        for message in new_messages
+                    ]
+                    lines.append(self._encode_line(self._meta_record(conversation)))
+                    with open(filepath, 'ab') as f:
+                        f.write(b"".join(lines))
+                        f.flush()
+                    self._persisted[conversation.id] = [message_count, state[1] + 1]
+                    self._index_conversation(self._db, conversation, filepath,
+                                             new_messages, rewrite=False)
             
             self.logger.debug(f"Saved conversation {conversation.id} to file")
             return True
-            
+        
         except Exception as e:
             self.logger.error(f"Error saving conversation to file: {e}")
             return False
     
+    def _write_log(self, conversation: Conversation):
+        """Rewrite a conversation's log from scratch"""
+        filepath = self._log_path(conversation.id)
+        lines = [self._encode_line(self._meta_record(conversation))]
+        lines.extend(
+            self._encode_line(self._message_record(message))
+            for message in conversation.messages
+        )
+        
+        # Swap the new log in so a crash never leaves it half written
+        tmp_path = filepath.with_name(filepath.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(b"".join(lines))
+        os.replace(tmp_path, filepath)
+        
+        # The JSONL log supersedes any single-document copy
+        legacy_path = self._legacy_path(conversation.id)
+        if legacy_path.exists():
+            legacy_path.unlink()
+        
+        self._persisted[conversation.id] = [len(conversation.messages), 0]
+    
+    def save_conversations(self, conversations: List[Conversation]) -> bool:
+        """Save a batch of conversations to files"""
+        results = [self.save_conversation(conversation) for conversation in conversations]
+        return all(results)
+    
     def load_conversation(self, conversation_id: str) -> Optional[Conversation]:
         """Load conversation from file"""
         try:
-            filename = f"conversation_{conversation_id}.json"
-            filepath = self.data_dir / filename
+            filepath = self._log_path(conversation_id)
             
-            if not filepath.exists():
+            if filepath.exists():
+                conversation = self._read_log(filepath)
+            elif self._legacy_path(conversation_id).exists():
+                conversation = self._read_legacy(self._legacy_path(conversation_id))
+            else:
                 self.logger.warning(f"Conversation file not found: {filepath}")
                 return None
             
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            conversation_data = data["conversation"]
-            
-            # Reconstruct messages
-            messages = []
-            for msg_data in conversation_data["messages"]:
-                message = Message(**msg_data)
-                messages.append(message)
-            
-            # Reconstruct conversation
-            conversation = Conversation(
-                id=conversation_data["id"],
-                title=conversation_data["title"],
-                messages=messages,
-                created_at=conversation_data["created_at"],
-                updated_at=conversation_data["updated_at"],
-                metadata=conversation_data.get("metadata")
-            )
-            
             self.logger.debug(f"Loaded conversation {conversation_id} from file")
             return conversation
-            
+        
         except Exception as e:
             self.logger.error(f"Error loading conversation from file: {e}")
             return None
     
+    def _read_log(self, filepath: Path) -> Optional[Conversation]:
+        """Rebuild a conversation from its JSONL log"""
+        meta = None
+        messages = []
+        
+        with open(filepath, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = self._decode(line)
+                except ValueError:
+                    # A torn final line from an interrupted append
+                    self.logger.warning(f"Skipping unreadable record in {filepath}")
+                    continue
+                
+                record_type = record.pop("type", None)
+                if record_type == "msg":
+                    messages.append(Message(**record))
+                elif record_type == "meta":
+                    meta = record
+        
+        if meta is None:
+            return None
+        
+        return Conversation(messages=messages, **meta)
+    
+    def _read_legacy(self, filepath: Path) -> Conversation:
+        """Load a conversation saved as a single JSON document"""
+        data = self._decode(filepath.read_bytes())
+        
+        conversation_data = data["conversation"]
+        
+        # Reconstruct messages
+        messages = []
+        for msg_data in conversation_data["messages"]:
+            message = Message(**msg_data)
+            messages.append(message)
+        
+        # Reconstruct conversation
+        return Conversation(
+            id=conversation_data["id"],
+            title=conversation_data["title"],
+            messages=messages,
+            created_at=conversation_data["created_at"],
+            updated_at=conversation_data["updated_at"],
+            metadata=conversation_data.get("metadata")
+        )
+    
+    def _conversation_files(self) -> List[Path]:
+        """All conversation files, logs and legacy documents"""
+        return list(self.data_dir.glob("conversation_*.jsonl")) + list(self.data_dir.glob("conversation_*.json"))
+    
     def delete_conversation(self, conversation_id: str) -> bool:
         """Delete conversation file"""
         try:
-            filename = f"conversation_{conversation_id}.json"
-            filepath = self.data_dir / filename
-            
-            if filepath.exists():
-                filepath.unlink()
-                self.logger.info(f"Deleted conversation file {filepath}")
-                return True
-            else:
-                self.logger.warning(f"Conversation file not found: {filepath}")
-                return False
+            with self._lock:
+                paths = [self._log_path(conversation_id), self._legacy_path(conversation_id)]
+                existing = [filepath for filepath in paths if filepath.exists()]
+                
+                if not existing:
+                    self.logger.warning(f"Conversation file not found: {paths[0]}")
+                    return False
                 
+                for filepath in existing:
+                    filepath.unlink()
+                    self.logger.info(f"Deleted conversation file {filepath}")
+                
+                self._persisted.pop(conversation_id, None)
+                with self._db:
+                    self._db.execute("DELETE FROM conv WHERE id = ?", (conversation_id,))
+                    if self._fts:
+                        self._db.execute("DELETE FROM conv_fts WHERE conv_id = ?", (conversation_id,))
+                return True
+        
         except Exception as e:
             self.logger.error(f"Error deleting conversation file: {e}")
             return False
     
+    def _summaries(self, rows) -> List[Dict]:
+        """Turn conv table rows into conversation summaries"""
+        return [
+            {
+                "id": row[0],
+                "title": row[1],
+                "message_count": row[2],
+                "created_at": row[3],
+                "updated_at": row[4]
+            }
+            for row in rows
+        ]
+    
     def list_conversations(self, limit: int = 50, offset: int = 0) -> List[Dict]:
-        """List conversations from files"""
+        """List conversations from the index"""
         try:
-            conversations = []
-            
-            # Get all conversation files
-            pattern = "conversation_*.json"
-            files = list(self.data_dir.glob(pattern))
-            
-            for filepath in files:
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    
-                    conv_data = data["conversation"]
-                    conversations.append({
-                        "id": conv_data["id"],
-                        "title": conv_data["title"],
-                        "message_count": len(conv_data["messages"]),
-                        "created_at": conv_data["created_at"],
-                        "updated_at": conv_data["updated_at"]
-                    })
-                    
-                except Exception as e:
-                    self.logger.warning(f"Error reading conversation file {filepath}: {e}")
-                    continue
-            
-            # Sort by updated_at (most recent first)
-            conversations.sort(key=lambda x: x["updated_at"], reverse=True)
-            
-            # Apply pagination
-            return conversations[offset:offset + limit]
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT id, title, msg_count, created_at, updated_at FROM conv "
+                    "ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+                    (limit, offset)
+                ).fetchall()
             
+            return self._summaries(rows)
+        
         except Exception as e:
             self.logger.error(f"Error listing conversations from files: {e}")
             return []
     
     def search_conversations(self, query: str, limit: int = 20) -> List[Dict]:
-        """Search conversations in files"""
+        """Search conversation titles and messages through the index"""
+        if not self._fts:
+            return self._scan_conversations(query, limit)
+        
+        try:
+            escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            pattern = f"%{escaped}%"
+            
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT id, title, msg_count, created_at, updated_at FROM conv "
+                    "WHERE title LIKE ? ESCAPE '\\' OR id IN ("
+                    "SELECT conv_id FROM conv_fts WHERE content LIKE ? ESCAPE '\\') "
+                    "ORDER BY updated_at DESC LIMIT ?",
+                    (pattern, pattern, limit)
+                ).fetchall()
+            
+            return self._summaries(rows)
+        
+        except Exception as e:
+            self.logger.error(f"Error searching conversations in files: {e}")
+            return []
+    
+    def _scan_conversations(self, query: str, limit: int) -> List[Dict]:
+        """Search by reading every conversation (no full-text index)"""
         try:
             query_lower = query.lower()
             matching_conversations = []
             
-            # Get all conversation files
-            pattern = "conversation_*.json"
-            files = list(self.data_dir.glob(pattern))
-            
-            for filepath in files:
+            for entry in self.list_conversations(limit=-1):
                 try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    
-                    conv_data = data["conversation"]
-                    
                     # Search in title
-                    title_match = query_lower in conv_data["title"].lower()
+                    if query_lower in entry["title"].lower():
+                        matching_conversations.append(entry)
+                        continue
                     
                     # Search in message content
-                    content_match = False
-                    for message in conv_data["messages"]:
-                        if query_lower in message["content"].lower():
-                            content_match = True
-                            break
-                    
-                    if title_match or content_match:
-                        matching_conversations.append({
-                            "id": conv_data["id"],
-                            "title": conv_data["title"],
-                            "message_count": len(conv_data["messages"]),
-                            "created_at": conv_data["created_at"],
-                            "updated_at": conv_data["updated_at"]
-                        })
-                    
+                    conversation = self.load_conversation(entry["id"])
+                    if conversation and any(
+                        query_lower in message.content.lower() for message in conversation.messages
+                    ):
+                        matching_conversations.append(entry)
+                
                 except Exception as e:
-                    self.logger.warning(f"Error searching conversation file {filepath}: {e}")
+                    self.logger.warning(f"Error searching conversation {entry['id']}: {e}")
                     continue
+                
+                if len(matching_conversations) >= limit:
+                    break
             
-            # Sort by updated_at and limit results
-            matching_conversations.sort(key=lambda x: x["updated_at"], reverse=True)
-            return matching_conversations[:limit]
-            
+            return matching_conversations
+        
         except Exception as e:
             self.logger.error(f"Error searching conversations in files: {e}")
             return []
@@ -194,18 +405,18 @@ class FileConversationStore:
     def get_conversation_stats(self) -> Dict:
         """Get statistics about stored conversations"""
         try:
-            pattern = "conversation_*.json"
-            files = list(self.data_dir.glob(pattern))
-            
-            total_size = sum(f.stat().st_size for f in files)
+            with self._lock:
+                total_conversations, total_size = self._db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM conv"
+                ).fetchone()
             
             return {
-                "total_conversations": len(files),
+                "total_conversations": total_conversations,
                 "storage_size_bytes": total_size,
                 "storage_size_mb": round(total_size / (1024 * 1024), 2),
                 "storage_directory": str(self.data_dir)
             }
-            
+        
         except Exception as e:
             self.logger.error(f"Error getting conversation stats: {e}")
             return {}
@@ -213,31 +424,16 @@ class FileConversationStore:
     def cleanup_old_conversations(self, days: int = 30) -> int:
         """Clean up conversations older than specified days"""
         try:
-            cutoff_timestamp = datetime.now().timestamp() - (days * 24 * 60 * 60)
-            pattern = "conversation_*.json"
-            files = list(self.data_dir.glob(pattern))
+            cutoff = (datetime.now() - timedelta(days=days)).isoformat()
             
-            deleted_count = 0
-            for filepath in files:
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    
-                    conv_data = data["conversation"]
-                    updated_at = conv_data["updated_at"]
-                    
-                    conv_timestamp = datetime.fromisoformat(updated_at).timestamp()
-                    if conv_timestamp < cutoff_timestamp:
-                        filepath.unlink()
-                        deleted_count += 1
-                        
-                except Exception as e:
-                    self.logger.warning(f"Error processing file {filepath}: {e}")
-                    continue
+            with self._lock:
+                rows = self._db.execute("SELECT id FROM conv WHERE updated_at < ?", (cutoff,)).fetchall()
+            
+            deleted_count = sum(1 for (conversation_id,) in rows if self.delete_conversation(conversation_id))
             
             self.logger.info(f"Cleaned up {deleted_count} old conversation files")
             return deleted_count
-            
+        
         except Exception as e:
             self.logger.error(f"Error cleaning up old conversations: {e}")
             return 0
@@ -3,13 +3,18 @@ Redis-based conversation storage with search capabilities
 """
 
 import json
+import time
 import uuid
 import redis
 from datetime import datetime
-from typing import List, Dict, Optional, Any
-from dataclasses import asdict
+from typing import List, Dict, Optional, Any, Tuple
 import hashlib
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from ..core.models import Message, Conversation
 from ..utils.logging import get_logger
 
@@ -17,34 +22,92 @@ from ..utils.logging import get_logger
 class RedisConversationStore:
     """Redis-based conversation storage with search capabilities"""
     
+    # Sorted set of conversation ids scored by their updated_at Unix time
+    UPDATED_INDEX_KEY = "conversations:by_updated"
+    # RediSearch index name, versioned so schema changes get a fresh index
+    SEARCH_INDEX = "conversations_idx:v2"
+    # Index replaced by SEARCH_INDEX, dropped when the new one is created
+    LEGACY_SEARCH_INDEX = "conversations_idx"
+    # Conversations fetched per round trip when walking the whole store
+    SCAN_BATCH_SIZE = 500
+    # Seconds get_conversation_stats() reuses its last result
+    STATS_TTL = 5.0
+    # Conversations expire this many seconds after their last update
+    CONVERSATION_TTL = 30 * 24 * 60 * 60
+    # Shortest expiry given to a saved conversation, however old its updated_at
+    MIN_TTL = 24 * 60 * 60
+    
+    # Writes one conversation atomically.
+    # KEYS: conversation hash, id set, updated_at sorted set
+    # ARGV: id, title, created_at, updated_at, updated_ts, message_count,
+    #       content, data, expire-at Unix time
+    SAVE_SCRIPT = """
+redis.call('HSET', KEYS[1],
+    'id', ARGV[1], 'title', ARGV[2], 'created_at', ARGV[3], 'updated_at', ARGV[4],
+    'updated_ts', ARGV[5], 'message_count', ARGV[6], 'content', ARGV[7], 'data', ARGV[8])
+redis.call('SADD', KEYS[2], ARGV[1])
+redis.call('ZADD', KEYS[3], ARGV[5], ARGV[1])
+redis.call('EXPIREAT', KEYS[1], ARGV[9])
+return 1
+"""
+    
     def __init__(self, config):
         self.config = config
         self.logger = get_logger(__name__)
         self.redis_client = None
+        self._pool = None
+        self._bytes_client = None  # undecoded replies for JSON payloads
+        self._has_search = False
+        self._stats_cache = None  # (expires at, stats)
+        self._save_script = None
+        self._save_script_sha = None  # SHA1 of SAVE_SCRIPT for pipelined EVALSHA
+        # Set when a command fails at the connection level, cleared by the next successful write
+        self.degraded = False
         self._connect()
     
     def _connect(self):
         """Connect to Redis"""
         try:
             redis_config = self.config.redis
-            self.redis_client = redis.Redis(
+            connection_kwargs = dict(
+                max_connections=redis_config.max_connections,
                 host=redis_config.host,
                 port=redis_config.port,
                 db=redis_config.db,
                 password=redis_config.password,
-                decode_responses=redis_config.decode_responses,
                 socket_timeout=redis_config.socket_timeout,
                 socket_connect_timeout=redis_config.socket_connect_timeout,
+                socket_keepalive=redis_config.socket_keepalive,
                 retry_on_timeout=redis_config.retry_on_timeout,
                 health_check_interval=redis_config.health_check_interval
             )
+            # Shared pool for the background writer and foreground commands;
+            # redis-py already sets TCP_NODELAY on every connection
+            self._pool = redis.BlockingConnectionPool(
+                decode_responses=redis_config.decode_responses, **connection_kwargs
+            )
+            self.redis_client = redis.Redis(connection_pool=self._pool)
+            
+            # Decoding is a pool setting, so payload reads get their own pool
+            # and hand raw bytes straight to the JSON parser
+            self._bytes_client = redis.Redis(connection_pool=redis.BlockingConnectionPool(
+                decode_responses=False, **connection_kwargs
+            ))
+            # Single saves run via EVALSHA, reloading the script on NOSCRIPT
+            self._save_script = self.redis_client.register_script(self.SAVE_SCRIPT)
             
             # Test connection
             self.redis_client.ping()
             self.logger.info("Connected to Redis successfully")
             
-            # Initialize search index if it doesn't exist
-            self._initialize_search_index()
+            # Loaded up front so batched saves can queue EVALSHA directly
+            self._save_script_sha = self.redis_client.script_load(self.SAVE_SCRIPT)
+            
+            # Initialize search index if it doesn't exist; creating the v2
+            # index marks the first start after an upgrade, when every
+            # existing hash still needs its updated_ts field and score
+            created = self._initialize_search_index()
+            self._backfill_updated_index(full=created)
             
         except redis.ConnectionError as e:
             self.logger.error(f"Failed to connect to Redis: {e}")
@@ -55,123 +118,272 @@ class RedisConversationStore:
             self.redis_client = None
             raise
     
-    def _initialize_search_index(self):
-        """Initialize Redis search index for conversations"""
+    def _initialize_search_index(self) -> bool:
+        """Initialize Redis search index for conversations; True if it was just created"""
+        created = False
         try:
             # Check if RediSearch is available
             info = self.redis_client.execute_command("MODULE", "LIST")
             has_search = any("search" in str(module).lower() for module in info)
+            self._has_search = has_search
             
             if has_search:
-                # Create search index for conversations
+                # Create search index for conversations. Only fields that are
+                # queried or sorted on are indexed; FT.SEARCH RETURN reads the
+                # rest straight from the hash. Sorting is by updated_ts, so
+                # term frequencies, highlighting and stopwords are not needed.
                 try:
                     self.redis_client.execute_command(
-                        "FT.CREATE", "conversations_idx",
+                        "FT.CREATE", self.SEARCH_INDEX,
                         "ON", "HASH",
                         "PREFIX", "1", "conversation:",
+                        "NOHL", "NOFREQS",
+                        "STOPWORDS", "0",
                         "SCHEMA",
+                        "id", "TAG",
                         "title", "TEXT", "WEIGHT", "2.0",
-                        "content", "TEXT", "WEIGHT", "1.0",
-                        "created_at", "NUMERIC", "SORTABLE",
-                        "updated_at", "NUMERIC", "SORTABLE",
-                        "message_count", "NUMERIC", "SORTABLE"
+                        "content", "TEXT",
+                        "updated_ts", "NUMERIC", "SORTABLE"
                     )
                     self.logger.info("Created Redis search index for conversations")
+                    created = True
                 except redis.ResponseError as e:
                     if "Index already exists" not in str(e):
                         self.logger.warning(f"Could not create search index: {e}")
+                
+                # The previous index declared the ISO timestamps as NUMERIC;
+                # drop it (keeping the documents) now that it is unused. Only
+                # the startup that creates the v2 index can still find it.
+                if created:
+                    self._drop_legacy_search_index()
             else:
                 self.logger.warning("RediSearch module not available - search functionality will be limited")
                 
         except Exception as e:
             self.logger.warning(f"Could not initialize search index: {e}")
+        return created
     
-    def is_connected(self) -> bool:
-        """Check if Redis connection is active"""
-        if not self.redis_client:
-            return False
+    def _drop_legacy_search_index(self):
+        """Drop the pre-v2 search index if it still exists"""
         try:
-            self.redis_client.ping()
-            return True
-        except:
-            return False
-    
-    def save_conversation(self, conversation: Conversation) -> bool:
-        """Save conversation to Redis"""
-        if not self.is_connected():
-            self.logger.error("Redis not connected")
-            return False
+            self.redis_client.execute_command("FT.INFO", self.LEGACY_SEARCH_INDEX)
+        except redis.ResponseError:
+            return  # already gone
         
         try:
-            conversation_key = f"conversation:{conversation.id}"
-            
-            # Prepare conversation data
-            conversation_data = asdict(conversation)
-            
-            # Create searchable content from messages
-            content_parts = []
-            for message in conversation.messages:
-                content_parts.append(f"{message.role}: {message.content}")
-            searchable_content = " ".join(content_parts)
-            
-            # Store main conversation data
-            self.redis_client.hset(conversation_key, mapping={
-                "id": conversation.id,
-                "title": conversation.title,
-                "created_at": conversation.created_at,
-                "updated_at": conversation.updated_at,
-                "message_count": len(conversation.messages),
-                "content": searchable_content[:5000],  # Limit content for search
-                "data": json.dumps(conversation_data)
-            })
-            
-            # Store individual messages for detailed retrieval
-            for i, message in enumerate(conversation.messages):
-                message_key = f"message:{conversation.id}:{i}"
-                self.redis_client.hset(message_key, mapping={
-                    "conversation_id": conversation.id,
-                    "message_index": i,
+            self.redis_client.execute_command("FT.DROPINDEX", self.LEGACY_SEARCH_INDEX)
+            self.logger.info(f"Dropped legacy search index {self.LEGACY_SEARCH_INDEX}")
+        except redis.ResponseError as e:
+            self.logger.warning(f"Could not drop legacy search index: {e}")
+    
+    def _backfill_updated_index(self, full: bool = False):
+        """Score and stamp conversations saved before updated_ts and its sorted set existed"""
+        try:
+            # Without a full pass, only a store that has never been indexed needs one
+            if not full and (self.redis_client.zcard(self.UPDATED_INDEX_KEY)
+                             or not self.redis_client.scard("conversations")):
+                return
+            
+            indexed = 0
+            batch = []
+            scan = self.redis_client.scan_iter(match="conversation:*", count=self.SCAN_BATCH_SIZE)
+            for key in scan:
+                batch.append(key)
+                if len(batch) >= self.SCAN_BATCH_SIZE:
+                    indexed += self._index_updated_batch(batch)
+                    batch = []
+            if batch:
+                indexed += self._index_updated_batch(batch)
+            
+            if indexed:
+                self.logger.info(f"Indexed {indexed} existing conversations by update time")
+                
+        except Exception as e:
+            self.logger.warning(f"Could not backfill conversation update index: {e}")
+    
+    def _index_updated_batch(self, conversation_keys: List[str]) -> int:
+        """Add updated_ts and a sorted-set score to one batch of conversation hashes"""
+        with self.redis_client.pipeline(transaction=False) as pipe:
+            for key in conversation_keys:
+                pipe.hmget(key, "id", "updated_at", "updated_ts")
+            rows = pipe.execute()
+        
+        scores = {}
+        with self.redis_client.pipeline(transaction=False) as pipe:
+            for key, (conv_id, updated_at, updated_ts) in zip(conversation_keys, rows):
+                try:
+                    score = float(updated_ts) if updated_ts is not None else self._timestamp(updated_at)
+                except (TypeError, ValueError):
+                    continue
+                if conv_id is None:
+                    continue
+                scores[conv_id] = score
+                if updated_ts is None:
+                    # Lets the search index sort hashes written before the field existed
+                    pipe.hset(key, "updated_ts", score)
+            if scores:
+                pipe.zadd(self.UPDATED_INDEX_KEY, scores)
+            pipe.execute()
+        return len(scores)
+    
+    @staticmethod
+    def _timestamp(value: str) -> float:
+        """Unix time of an ISO-8601 timestamp"""
+        return datetime.fromisoformat(value).timestamp()
+    
+    def is_connected(self) -> bool:
+        """Check if a Redis client was set up"""
+        # Liveness is left to the pool's health checks and each command's
+        # own error handling rather than a PING round trip per call
+        return self.redis_client is not None
+    
+    def _note_failure(self, error: Exception):
+        """Mark the store degraded when a command could not reach Redis"""
+        if isinstance(error, (redis.ConnectionError, redis.TimeoutError)):
+            self.degraded = True
+    
+    @staticmethod
+    def _conversation_dict(conversation: Conversation) -> Dict:
+        """Plain dict of a conversation that shares its field values instead of deep-copying them"""
+        return {
+            "id": conversation.id,
+            "title": conversation.title,
+            "messages": [
+                {
                     "id": message.id,
                     "role": message.role,
                     "content": message.content,
                     "timestamp": message.timestamp,
-                    "metadata": json.dumps(message.metadata or {})
-                })
-            
-            # Add to conversation list
-            self.redis_client.sadd("conversations", conversation.id)
-            
-            # Set expiration (optional - 30 days)
-            self.redis_client.expire(conversation_key, 30 * 24 * 60 * 60)
+                    "metadata": message.metadata
+                }
+                for message in conversation.messages
+            ],
+            "created_at": conversation.created_at,
+            "updated_at": conversation.updated_at,
+            "metadata": conversation.metadata
+        }
+    
+    @classmethod
+    def _encode_conversation(cls, conversation: Conversation) -> bytes:
+        """Serialize a conversation to JSON bytes"""
+        if orjson:
+            # orjson serializes dataclasses natively, without asdict() copies
+            return orjson.dumps(conversation)
+        return json.dumps(cls._conversation_dict(conversation), ensure_ascii=False).encode('utf-8')
+    
+    @staticmethod
+    def _decode(data: bytes):
+        """Parse JSON bytes"""
+        return orjson.loads(data) if orjson else json.loads(data)
+    
+    def _save_args(self, conversation: Conversation) -> Tuple[List[str], List[Any]]:
+        """KEYS and ARGV for one SAVE_SCRIPT call"""
+        conversation_key = f"conversation:{conversation.id}"
+        updated_ts = self._timestamp(conversation.updated_at)
+        
+        # Create searchable content from messages
+        content_parts = []
+        for message in conversation.messages:
+            content_parts.append(f"{message.role}: {message.content}")
+        searchable_content = " ".join(content_parts)
+        
+        # Hash fields, set membership, sorted-set score and expiry in one
+        # atomic script call, so a failed save never leaves partial state.
+        # The expiry is derived from updated_at, matching the sorted-set
+        # score cleanup_old_conversations() uses, but never lands in the
+        # past: EXPIREAT with a past time deletes the hash at once while
+        # the save reports success and the indexes keep the id.
+        expire_at = max(int(updated_ts) + self.CONVERSATION_TTL, int(time.time()) + self.MIN_TTL)
+        keys = [conversation_key, "conversations", self.UPDATED_INDEX_KEY]
+        args = [
+            conversation.id,
+            conversation.title,
+            conversation.created_at,
+            conversation.updated_at,
+            updated_ts,
+            len(conversation.messages),
+            searchable_content[:5000],  # Limit content for search
+            self._encode_conversation(conversation),
+            expire_at
+        ]
+        return keys, args
+    
+    def _pipeline_saves(self, saves: List[Tuple[List[str], List[Any]]]) -> List[Any]:
+        """Send one EVALSHA of the save script per (keys, args) pair"""
+        with self.redis_client.pipeline(transaction=False) as pipe:
+            for keys, args in saves:
+                pipe.evalsha(self._save_script_sha, len(keys), *keys, *args)
+            return pipe.execute(raise_on_error=False)
+    
+    def _execute_saves(self, conversations: List[Conversation]) -> List[Any]:
+        """Save a batch with pipelined EVALSHA, reloading the script on NOSCRIPT"""
+        saves = [self._save_args(conversation) for conversation in conversations]
+        results = self._pipeline_saves(saves)
+        
+        if any(isinstance(result, redis.exceptions.NoScriptError) for result in results):
+            # The script cache was flushed or the server restarted; every
+            # write in the batch is idempotent, so load it and resend them all
+            self._save_script_sha = self.redis_client.script_load(self.SAVE_SCRIPT)
+            results = self._pipeline_saves(saves)
+        return results
+    
+    def _check_pipeline(self, results: List[Any], action: str) -> bool:
+        """Log any per-command errors returned by a pipeline"""
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            self.logger.error(f"{len(errors)} Redis command(s) failed while {action}: {errors[0]}")
+            return False
+        self.degraded = False
+        return True
+    
+    def save_conversation(self, conversation: Conversation) -> bool:
+        """Save conversation to Redis"""
+        try:
+            # EVALSHA, plus a SCRIPT LOAD and a retry only if the server
+            # has lost the script
+            keys, args = self._save_args(conversation)
+            self._save_script(keys=keys, args=args)
+            self.degraded = False
             
             self.logger.debug(f"Saved conversation {conversation.id} to Redis")
             return True
             
         except Exception as e:
+            self._note_failure(e)
             self.logger.error(f"Error saving conversation to Redis: {e}")
             return False
     
+    def save_conversations(self, conversations: List[Conversation]) -> bool:
+        """Save a batch of conversations in a single Redis pipeline"""
+        try:
+            # One round trip for the whole batch unless the script needs reloading
+            results = self._execute_saves(conversations)
+            
+            if not self._check_pipeline(results, f"saving {len(conversations)} conversation(s)"):
+                return False
+            
+            self.logger.debug(f"Saved {len(conversations)} conversation(s) to Redis")
+            return True
+            
+        except Exception as e:
+            self._note_failure(e)
+            self.logger.error(f"Error saving conversations to Redis: {e}")
+            return False
+    
     def load_conversation(self, conversation_id: str) -> Optional[Conversation]:
         """Load conversation from Redis"""
-        if not self.is_connected():
-            self.logger.error("Redis not connected")
-            return None
-        
         try:
             conversation_key = f"conversation:{conversation_id}"
             
-            # Check if conversation exists
-            if not self.redis_client.exists(conversation_key):
-                self.logger.warning(f"Conversation {conversation_id} not found in Redis")
-                return None
-            
-            # Get conversation data
-            conversation_data = self.redis_client.hget(conversation_key, "data")
+            # Get conversation data; a missing key reads as None, so no
+            # separate EXISTS round trip is needed
+            conversation_data = self._bytes_client.hget(conversation_key, "data")
             if not conversation_data:
+                self.logger.warning(f"Conversation {conversation_id} not found in Redis")
                 return None
             
             # Parse conversation data
-            data = json.loads(conversation_data)
+            data = self._decode(conversation_data)
             
             # Reconstruct messages
             messages = []
@@ -193,58 +405,65 @@ class RedisConversationStore:
             return conversation
             
         except Exception as e:
+            self._note_failure(e)
             self.logger.error(f"Error loading conversation from Redis: {e}")
             return None
     
+    def _queue_delete(self, pipe, conversation_id: str, message_count: int):
+        """Queue the removal of one conversation and its messages on a pipeline"""
+        # Messages now live only in the conversation's data field; the
+        # per-message hashes are still removed for conversations saved earlier
+        message_keys = [f"message:{conversation_id}:{i}" for i in range(message_count)]
+        
+        # UNLINK frees the values off the server's main thread
+        pipe.unlink(f"conversation:{conversation_id}", *message_keys)
+        
+        # Remove from conversation list
+        pipe.srem("conversations", conversation_id)
+        pipe.zrem(self.UPDATED_INDEX_KEY, conversation_id)
+    
     def delete_conversation(self, conversation_id: str) -> bool:
         """Delete conversation from Redis"""
-        if not self.is_connected():
-            self.logger.error("Redis not connected")
-            return False
-        
         try:
             conversation_key = f"conversation:{conversation_id}"
             
             # Get message count to delete individual messages
             message_count = self.redis_client.hget(conversation_key, "message_count")
-            if message_count:
-                message_count = int(message_count)
-                # Delete individual messages
-                for i in range(message_count):
-                    message_key = f"message:{conversation_id}:{i}"
-                    self.redis_client.delete(message_key)
             
-            # Delete main conversation
-            self.redis_client.delete(conversation_key)
+            with self.redis_client.pipeline(transaction=False) as pipe:
+                self._queue_delete(pipe, conversation_id, int(message_count or 0))
+                results = pipe.execute(raise_on_error=False)
             
-            # Remove from conversation list
-            self.redis_client.srem("conversations", conversation_id)
+            if not self._check_pipeline(results, f"deleting conversation {conversation_id}"):
+                return False
             
             self.logger.info(f"Deleted conversation {conversation_id} from Redis")
             return True
             
         except Exception as e:
+            self._note_failure(e)
             self.logger.error(f"Error deleting conversation from Redis: {e}")
             return False
     
     def list_conversations(self, limit: int = 50, offset: int = 0) -> List[Dict]:
         """List conversations with pagination"""
-        if not self.is_connected():
-            self.logger.error("Redis not connected")
-            return []
-        
         try:
-            # Get all conversation IDs
-            conversation_ids = list(self.redis_client.smembers("conversations"))
+            # Most recently updated first, paginated on the server
+            conversation_ids = self.redis_client.zrevrange(
+                self.UPDATED_INDEX_KEY, offset, offset + limit - 1
+            )
+            
+            # Fetch the whole page in one round trip
+            with self.redis_client.pipeline(transaction=False) as pipe:
+                for conv_id in conversation_ids:
+                    pipe.hmget(
+                        f"conversation:{conv_id}",
+                        "id", "title", "created_at", "updated_at", "message_count"
+                    )
+                rows = pipe.execute()
             
             conversations = []
-            for conv_id in conversation_ids[offset:offset + limit]:
-                conversation_key = f"conversation:{conv_id}"
-                conv_info = self.redis_client.hmget(
-                    conversation_key,
-                    "id", "title", "created_at", "updated_at", "message_count"
-                )
-                
+            for conv_info in rows:
                 if all(conv_info):
                     conversations.append({
                         "id": conv_info[0],
@@ -254,51 +473,46 @@ class RedisConversationStore:
                         "message_count": int(conv_info[4]) if conv_info[4] else 0
                     })
             
-            # Sort by updated_at (most recent first)
-            conversations.sort(key=lambda x: x["updated_at"], reverse=True)
-            
             return conversations
             
         except Exception as e:
+            self._note_failure(e)
             self.logger.error(f"Error listing conversations from Redis: {e}")
             return []
     
     def search_conversations(self, query: str, limit: int = 20) -> List[Dict]:
         """Search conversations using Redis search"""
-        if not self.is_connected():
-            self.logger.error("Redis not connected")
-            return []
-        
         try:
+            if not self._has_search:
+                return self._manual_search(query, limit)
+            
             # Try using RediSearch if available
             try:
                 search_query = f"@title:({query}) | @content:({query})"
                 results = self.redis_client.execute_command(
-                    "FT.SEARCH", "conversations_idx", search_query,
+                    "FT.SEARCH", self.SEARCH_INDEX, search_query,
                     "LIMIT", "0", str(limit),
-                    "SORTBY", "updated_at", "DESC"
+                    "SORTBY", "updated_ts", "DESC",
+                    # Only the summary fields, never the content blob
+                    "RETURN", "5", "id", "title", "created_at", "updated_at", "message_count"
                 )
                 
                 conversations = []
-                # Parse search results (skip count at index 0)
-                for i in range(1, len(results), 2):
-                    if i + 1 < len(results):
-                        conv_key = results[i]
-                        conv_data = results[i + 1]
-                        
-                        # Convert list to dict
-                        data_dict = {}
-                        for j in range(0, len(conv_data), 2):
-                            if j + 1 < len(conv_data):
-                                data_dict[conv_data[j]] = conv_data[j + 1]
-                        
-                        conversations.append({
-                            "id": data_dict.get("id", ""),
-                            "title": data_dict.get("title", ""),
-                            "created_at": data_dict.get("created_at", ""),
-                            "updated_at": data_dict.get("updated_at", ""),
-                            "message_count": int(data_dict.get("message_count", 0))
-                        })
+                # Results are [count, key, fields, key, fields, ...], and
+                # each fields list alternates names and values
+                replies = iter(results)
+                next(replies, None)
+                for conv_key, conv_data in zip(replies, replies):
+                    fields = iter(conv_data)
+                    data_dict = dict(zip(fields, fields))
+                    
+                    conversations.append({
+                        "id": data_dict.get("id", ""),
+                        "title": data_dict.get("title", ""),
+                        "created_at": data_dict.get("created_at", ""),
+                        "updated_at": data_dict.get("updated_at", ""),
+                        "message_count": int(data_dict.get("message_count", 0))
+                    })
                 
                 return conversations
                 
@@ -307,6 +521,7 @@ class RedisConversationStore:
                 return self._manual_search(query, limit)
                 
         except Exception as e:
+            self._note_failure(e)
             self.logger.error(f"Error searching conversations in Redis: {e}")
             return []
     
@@ -314,86 +529,118 @@ class RedisConversationStore:
         """Manual search fallback when RediSearch is not available"""
         try:
             query_lower = query.lower()
-            conversation_ids = list(self.redis_client.smembers("conversations"))
-            
             matching_conversations = []
-            for conv_id in conversation_ids:
-                conversation_key = f"conversation:{conv_id}"
-                conv_data = self.redis_client.hmget(
-                    conversation_key,
-                    "id", "title", "content", "created_at", "updated_at", "message_count"
+            
+            # Walk conversations newest first one batch at a time, so matches
+            # come out already sorted and the scan stops once limit is reached
+            start = 0
+            while len(matching_conversations) < limit:
+                conversation_ids = self.redis_client.zrevrange(
+                    self.UPDATED_INDEX_KEY, start, start + self.SCAN_BATCH_SIZE - 1
                 )
+                if not conversation_ids:
+                    break
+                start += len(conversation_ids)
                 
-                if all(conv_data[:2]):  # At least id and title exist
-                    title = conv_data[1].lower()
-                    content = (conv_data[2] or "").lower()
-                    
-                    if query_lower in title or query_lower in content:
-                        matching_conversations.append({
-                            "id": conv_data[0],
-                            "title": conv_data[1],
-                            "created_at": conv_data[3] or "",
-                            "updated_at": conv_data[4] or "",
-                            "message_count": int(conv_data[5]) if conv_data[5] else 0
-                        })
-            
-            # Sort by updated_at and limit results
-            matching_conversations.sort(key=lambda x: x["updated_at"], reverse=True)
+                with self.redis_client.pipeline(transaction=False) as pipe:
+                    for conv_id in conversation_ids:
+                        pipe.hmget(
+                            f"conversation:{conv_id}",
+                            "id", "title", "content", "created_at", "updated_at", "message_count"
+                        )
+                    rows = pipe.execute()
+                
+                for conv_data in rows:
+                    if all(conv_data[:2]):  # At least id and title exist
+                        title = conv_data[1].lower()
+                        content = (conv_data[2] or "").lower()
+                        
+                        if query_lower in title or query_lower in content:
+                            matching_conversations.append({
+                                "id": conv_data[0],
+                                "title": conv_data[1],
+                                "created_at": conv_data[3] or "",
+                                "updated_at": conv_data[4] or "",
+                                "message_count": int(conv_data[5]) if conv_data[5] else 0
+                            })
+            
             return matching_conversations[:limit]
             
         except Exception as e:
+            self._note_failure(e)
             self.logger.error(f"Error in manual search: {e}")
             return []
     
     def get_conversation_stats(self) -> Dict[str, Any]:
         """Get statistics about stored conversations"""
-        if not self.is_connected():
-            return {}
+        now = time.monotonic()
+        if self._stats_cache is not None and now < self._stats_cache[0]:
+            return dict(self._stats_cache[1])
         
         try:
-            total_conversations = self.redis_client.scard("conversations")
-            
-            # Get memory usage info
-            memory_info = self.redis_client.info("memory")
+            # The count and every INFO section in one round trip
+            with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.scard("conversations")
+                pipe.info()
+                total_conversations, info = pipe.execute()
             
-            return {
+            stats = {
                 "total_conversations": total_conversations,
-                "redis_memory_used": memory_info.get("used_memory_human", "Unknown"),
-                "redis_connected_clients": self.redis_client.info("clients").get("connected_clients", 0),
-                "redis_version": self.redis_client.info("server").get("redis_version", "Unknown")
+                "redis_memory_used": info.get("used_memory_human", "Unknown"),
+                "redis_connected_clients": info.get("connected_clients", 0),
+                "redis_version": info.get("redis_version", "Unknown")
             }
+            self._stats_cache = (now + self.STATS_TTL, stats)
+            return dict(stats)
             
         except Exception as e:
+            self._note_failure(e)
             self.logger.error(f"Error getting conversation stats: {e}")
             return {}
     
     def cleanup_old_conversations(self, days: int = 30) -> int:
         """Clean up conversations older than specified days"""
-        if not self.is_connected():
-            return 0
-        
         try:
             cutoff_timestamp = datetime.now().timestamp() - (days * 24 * 60 * 60)
-            conversation_ids = list(self.redis_client.smembers("conversations"))
             
             deleted_count = 0
-            for conv_id in conversation_ids:
-                conversation_key = f"conversation:{conv_id}"
-                updated_at = self.redis_client.hget(conversation_key, "updated_at")
+            while True:
+                # Only the expired range of the sorted set is read, one
+                # batch at a time; deleted ids leave the set, so the next
+                # batch starts from the front again
+                expired = self.redis_client.zrangebyscore(
+                    self.UPDATED_INDEX_KEY, "-inf", f"({cutoff_timestamp}",
+                    start=0, num=self.SCAN_BATCH_SIZE
+                )
+                if not expired:
+                    break
+                
+                with self.redis_client.pipeline(transaction=False) as pipe:
+                    for conv_id in expired:
+                        pipe.hget(f"conversation:{conv_id}", "message_count")
+                    message_counts = pipe.execute()
+                
+                # Remove the whole batch in one round trip
+                with self.redis_client.pipeline(transaction=False) as pipe:
+                    for conv_id, message_count in zip(expired, message_counts):
+                        self._queue_delete(pipe, conv_id, int(message_count or 0))
+                    results = pipe.execute(raise_on_error=False)
+                
+                # Each conversation queues the same commands, UNLINK first
+                stride = len(results) // len(expired)
+                deleted_count += sum(
+                    1 for unlinked in results[::stride]
+                    if not isinstance(unlinked, Exception)
+                )
                 
-                if updated_at:
-                    try:
-                        conv_timestamp = datetime.fromisoformat(updated_at).timestamp()
-                        if conv_timestamp < cutoff_timestamp:
-                            if self.delete_conversation(conv_id):
-                                deleted_count += 1
-                    except ValueError:
-                        # Skip conversations with invalid timestamps
-                        continue
+                # Ids that failed to delete would be fetched again forever
+                if not self._check_pipeline(results, "cleaning up old conversations"):
+                    break
             
             self.logger.info(f"Cleaned up {deleted_count} old conversations")
             return deleted_count
             
         except Exception as e:
+            self._note_failure(e)
             self.logger.error(f"Error cleaning up old conversations: {e}")
             return 0
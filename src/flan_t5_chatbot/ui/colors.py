@@ -2,15 +2,85 @@
 ANSI color codes for terminal output
 """
 
+import functools
 import os
 import sys
 
 
-class Colors:
+class _ColorsMeta(type):
+    """Resolves color names on first use instead of at import time"""
+    
+    def __getattr__(cls, name):
+        try:
+            code = cls._ANSI[name]
+        except KeyError:
+            raise AttributeError(f"type object 'Colors' has no attribute '{name}'") from None
+        
+        # Cache on the class so later lookups are plain attribute hits
+        value = code if cls.colors_enabled else ''
+        setattr(cls, name, value)
+        return value
+    
+    @property
+    def colors_enabled(cls) -> bool:
+        """Whether color codes are emitted"""
+        if cls._override is not None:
+            return cls._override
+        return cls._should_use_colors()
+
+
+class Colors(metaclass=_ColorsMeta):
     """ANSI color codes for terminal output"""
     
-    # Check if colors should be enabled
+    _ANSI = {
+        'RESET': '\033[0m',
+        'BOLD': '\033[1m',
+        'DIM': '\033[2m',
+        
+        # Foreground colors
+        'BLACK': '\033[30m',
+        'RED': '\033[31m',
+        'GREEN': '\033[32m',
+        'YELLOW': '\033[33m',
+        'BLUE': '\033[34m',
+        'MAGENTA': '\033[35m',
+        'CYAN': '\033[36m',
+        'WHITE': '\033[37m',
+        
+        # Bright colors
+        'BRIGHT_RED': '\033[91m',
+        'BRIGHT_GREEN': '\033[92m',
+        'BRIGHT_YELLOW': '\033[93m',
+        'BRIGHT_BLUE': '\033[94m',
+        'BRIGHT_MAGENTA': '\033[95m',
+        'BRIGHT_CYAN': '\033[96m',
+        'BRIGHT_WHITE': '\033[97m',
+        
+        # Background colors
+        'BG_BLACK': '\033[40m',
+        'BG_RED': '\033[41m',
+        'BG_GREEN': '\033[42m',
+        'BG_YELLOW': '\033[43m',
+        'BG_BLUE': '\033[44m',
+        'BG_MAGENTA': '\033[45m',
+        'BG_CYAN': '\033[46m',
+        'BG_WHITE': '\033[47m',
+    }
+    
+    # Message styles, resolved once like the codes above
+    _ANSI.update(
+        INFO_STYLE=_ANSI['CYAN'],
+        SUCCESS_STYLE=_ANSI['BRIGHT_GREEN'],
+        ERROR_STYLE=_ANSI['BRIGHT_RED'],
+        WARNING_STYLE=_ANSI['BRIGHT_YELLOW'],
+    )
+    
+    # Set by enable_colors()/disable_colors(); None means auto-detect
+    _override = None
+    
+    # Check if colors should be enabled (detected once, on first use)
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def _should_use_colors():
         """Determine if colors should be used"""
         # Force colors if FORCE_COLOR is set
@@ -41,93 +111,31 @@ class Colors:
         # Default to True for most cases (be more permissive)
         return True
     
-    # Initialize colors based on detection
-    colors_enabled = _should_use_colors()
-    
-    if colors_enabled:
-        RESET = '\033[0m'
-        BOLD = '\033[1m'
-        DIM = '\033[2m'
-        
-        # Foreground colors
-        BLACK = '\033[30m'
-        RED = '\033[31m'
-        GREEN = '\033[32m'
-        YELLOW = '\033[33m'
-        BLUE = '\033[34m'
-        MAGENTA = '\033[35m'
-        CYAN = '\033[36m'
-        WHITE = '\033[37m'
-        
-        # Bright colors
-        BRIGHT_RED = '\033[91m'
-        BRIGHT_GREEN = '\033[92m'
-        BRIGHT_YELLOW = '\033[93m'
-        BRIGHT_BLUE = '\033[94m'
-        BRIGHT_MAGENTA = '\033[95m'
-        BRIGHT_CYAN = '\033[96m'
-        BRIGHT_WHITE = '\033[97m'
-        
-        # Background colors
-        BG_BLACK = '\033[40m'
-        BG_RED = '\033[41m'
-        BG_GREEN = '\033[42m'
-        BG_YELLOW = '\033[43m'
-        BG_BLUE = '\033[44m'
-        BG_MAGENTA = '\033[45m'
-        BG_CYAN = '\033[46m'
-        BG_WHITE = '\033[47m'
-    else:
-        # No colors - all empty strings
-        RESET = BOLD = DIM = ''
-        BLACK = RED = GREEN = YELLOW = BLUE = MAGENTA = CYAN = WHITE = ''
-        BRIGHT_RED = BRIGHT_GREEN = BRIGHT_YELLOW = BRIGHT_BLUE = ''
-        BRIGHT_MAGENTA = BRIGHT_CYAN = BRIGHT_WHITE = ''
-        BG_BLACK = BG_RED = BG_GREEN = BG_YELLOW = BG_BLUE = ''
-        BG_MAGENTA = BG_CYAN = BG_WHITE = ''
+    @classmethod
+    def _reset(cls):
+        """Forget materialized codes so they are resolved again on next use"""
+        for name in cls._ANSI:
+            if name in cls.__dict__:
+                delattr(cls, name)
     
     @classmethod
     def disable_colors(cls):
         """Disable all colors by setting them to empty strings"""
-        cls.colors_enabled = False
-        cls.RESET = cls.BOLD = cls.DIM = ''
-        cls.BLACK = cls.RED = cls.GREEN = cls.YELLOW = cls.BLUE = ''
-        cls.MAGENTA = cls.CYAN = cls.WHITE = ''
-        cls.BRIGHT_RED = cls.BRIGHT_GREEN = cls.BRIGHT_YELLOW = ''
-        cls.BRIGHT_BLUE = cls.BRIGHT_MAGENTA = cls.BRIGHT_CYAN = cls.BRIGHT_WHITE = ''
-        cls.BG_BLACK = cls.BG_RED = cls.BG_GREEN = cls.BG_YELLOW = ''
-        cls.BG_BLUE = cls.BG_MAGENTA = cls.BG_CYAN = cls.BG_WHITE = ''
+        cls._override = False
+        cls._reset()
     
     @classmethod
     def enable_colors(cls):
         """Force enable all colors"""
-        cls.colors_enabled = True
-        cls.RESET = '\033[0m'
-        cls.BOLD = '\033[1m'
-        cls.DIM = '\033[2m'
-        cls.BLACK = '\033[30m'
-        cls.RED = '\033[31m'
-        cls.GREEN = '\033[32m'
-        cls.YELLOW = '\033[33m'
-        cls.BLUE = '\033[34m'
-        cls.MAGENTA = '\033[35m'
-        cls.CYAN = '\033[36m'
-        cls.WHITE = '\033[37m'
-        cls.BRIGHT_RED = '\033[91m'
-        cls.BRIGHT_GREEN = '\033[92m'
-        cls.BRIGHT_YELLOW = '\033[93m'
-        cls.BRIGHT_BLUE = '\033[94m'
-        cls.BRIGHT_MAGENTA = '\033[95m'
-        cls.BRIGHT_CYAN = '\033[96m'
-        cls.BRIGHT_WHITE = '\033[97m'
-        cls.BG_BLACK = '\033[40m'
-        cls.BG_RED = '\033[41m'
-        cls.BG_GREEN = '\033[42m'
-        cls.BG_YELLOW = '\033[43m'
-        cls.BG_BLUE = '\033[44m'
-        cls.BG_MAGENTA = '\033[45m'
-        cls.BG_CYAN = '\033[46m'
-        cls.BG_WHITE = '\033[47m'
+        cls._override = True
+        cls._reset()
+    
+    @classmethod
+    def wrap(cls, style: str, text: str) -> str:
+        """Wrap text in a style and a reset, or return it as-is without colors"""
+        if not style:
+            return text
+        return f"{style}{text}{cls.RESET}"
     
     @classmethod
     def status(cls):
@@ -2,9 +2,10 @@
 UI Manager - Handle all user interface interactions
 """
 
+import asyncio
 import os
 import sys
-import time
+import textwrap
 import threading
 from typing import List
 import shutil
@@ -14,6 +15,12 @@ from .colors import Colors
 from ..utils.logging import get_logger
 from .. import __version__
 
+try:
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.formatted_text import ANSI
+except ImportError:
+    PromptSession = None
+
 
 class UIManager:
     """Manages all user interface interactions"""
@@ -22,8 +29,23 @@ class UIManager:
         self.config = config
         self.logger = get_logger(__name__)
         self.terminal_width = self._get_terminal_width()
+        # Words are only split on whitespace, never inside a word or at hyphens
+        self._wrapper = textwrap.TextWrapper(
+            width=max(self.terminal_width - 4, 1),
+            break_long_words=False,
+            break_on_hyphens=False,
+            drop_whitespace=True
+        )
         self.typing_active = False
-        self.typing_thread = None
+        # The loading spinner and typing indicator are drawn by one daemon
+        # started on first use and parked on this condition while no
+        # animation is active; it is never handed blocking work
+        self._animation = None  # (frames, seconds per frame) being drawn
+        self._animation_thread = None
+        self._animation_cond = threading.Condition()
+        self._animation_idle = threading.Event()
+        self._animation_closed = False
+        self._prompt_session = None
         
         # Handle color settings
         if no_color:
@@ -33,6 +55,8 @@ class UIManager:
             if not Colors.colors_enabled:
                 Colors.enable_colors()
         
+        self._rebuild_static_strings()
+        
 
     
     def _get_terminal_width(self) -> int:
@@ -46,8 +70,8 @@ class UIManager:
         """Check if terminal supports colors"""
         return Colors.colors_enabled
     
-    def print_header(self):
-        """Print application header"""
+    def _rebuild_static_strings(self):
+        """Render the header, welcome and help text for the current color settings"""
         header = f"""
 ╔══════════════════════════════════════════════════════════════════════════════╗
 ║                            FLAN-T5 ChatBot v{__version__:<8}                        ║
@@ -55,11 +79,9 @@ class UIManager:
 ║                        Powered by Google FLAN-T5-Large                      ║
 ╚══════════════════════════════════════════════════════════════════════════════╝
         """
-        print(f"{Colors.BRIGHT_CYAN}{header}{Colors.RESET}")
-    
-    def print_welcome_message(self):
-        """Print welcome message"""
-        welcome = f"""
+        self._header_str = f"{Colors.BRIGHT_CYAN}{header}{Colors.RESET}"
+        
+        self._welcome_str = f"""
 {Colors.BRIGHT_GREEN}Welcome to FLAN-T5 ChatBot!{Colors.RESET}
 
 This is an intelligent conversational AI powered by Google's FLAN-T5-Large model.
@@ -75,11 +97,8 @@ I'm here to help you with questions, tasks, and engaging conversations.
 {Colors.CYAN}Type your message and press Enter to start chatting!{Colors.RESET}
 Type {Colors.BOLD}/help{Colors.RESET} for available commands.
         """
-        print(welcome)
-    
-    def print_help(self):
-        """Print help information"""
-        help_text = f"""
+        
+        self._help_str = f"""
 {Colors.BRIGHT_YELLOW}Available Commands:{Colors.RESET}
 
 {Colors.BOLD}Chat Commands:{Colors.RESET}
@@ -105,76 +124,141 @@ Type {Colors.BOLD}/help{Colors.RESET} for available commands.
 {Colors.DIM}Simply type your message to chat with the AI assistant.{Colors.RESET}
 {Colors.DIM}Example: /search "machine learning" to find related conversations{Colors.RESET}
         """
-        print(help_text)
+        
+        # Prompt is also fixed once colors are settled
+        self._prompt_str = f"{Colors.BRIGHT_BLUE}You:{Colors.RESET} "
+    
+    def print_header(self):
+        """Print application header"""
+        print(self._header_str)
+    
+    def print_welcome_message(self):
+        """Print welcome message"""
+        print(self._welcome_str)
+    
+    def print_help(self):
+        """Print help information"""
+        print(self._help_str)
     
     def get_user_input(self) -> str:
         """Get user input with a nice prompt"""
         try:
-            prompt = f"{Colors.BRIGHT_BLUE}You:{Colors.RESET} "
-            return input(prompt).strip()
+            return input(self._prompt_str).strip()
         except (EOFError, KeyboardInterrupt):
             return "/quit"
     
+    async def get_user_input_async(self) -> str:
+        """Get user input without blocking the event loop"""
+        if PromptSession is not None:
+            if self._prompt_session is None:
+                self._prompt_session = PromptSession()
+            try:
+                prompt = ANSI(self._prompt_str)
+                return (await self._prompt_session.prompt_async(prompt)).strip()
+            except (EOFError, KeyboardInterrupt):
+                return "/quit"
+        
+        # Fall back to input() on a daemon thread so a pending read never
+        # keeps the interpreter alive on shutdown
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        def deliver(result):
+            if not future.done():
+                future.set_result(result)
+        
+        def read_input():
+            loop.call_soon_threadsafe(deliver, self.get_user_input())
+        
+        threading.Thread(target=read_input, daemon=True).start()
+        return await future
+    
     def print_assistant_response(self, response: str):
         """Print assistant response with formatting"""
         timestamp = datetime.now().strftime("%H:%M:%S")
         
-        print(f"\n{Colors.BRIGHT_GREEN}Assistant{Colors.RESET} {Colors.DIM}({timestamp}):{Colors.RESET}")
-        
         # Word wrap the response
         wrapped_response = self._wrap_text(response, self.terminal_width - 4)
+        body = "\n".join(f"  {line}" for line in wrapped_response.split('\n'))
         
-        for line in wrapped_response.split('\n'):
-            print(f"  {line}")
-        
-        print()  # Add spacing
+        # Header, indented body and trailing spacing in one write
+        sys.stdout.write(
+            f"\n{Colors.BRIGHT_GREEN}Assistant{Colors.RESET} {Colors.DIM}({timestamp}):{Colors.RESET}\n"
+            f"{body}\n\n"
+        )
+        sys.stdout.flush()
     
     def print_info(self, message: str):
         """Print info message"""
-        print(f"{Colors.CYAN} {message}{Colors.RESET}")
+        print(Colors.wrap(Colors.INFO_STYLE, f" {message}"))
+    
+    def print_info_lines(self, lines: List[str]):
+        """Print several info lines, indented like print_info, in one write"""
+        print(Colors.wrap(Colors.INFO_STYLE, "\n".join(f" {line}" for line in lines)))
     
     def print_success(self, message: str):
         """Print success message"""
-        print(f"{Colors.BRIGHT_GREEN}✓ {message}{Colors.RESET}")
+        print(Colors.wrap(Colors.SUCCESS_STYLE, f"✓ {message}"))
     
     def print_error(self, message: str):
         """Print error message"""
-        print(f"{Colors.BRIGHT_RED}✗ {message}{Colors.RESET}")
+        print(Colors.wrap(Colors.ERROR_STYLE, f"✗ {message}"))
     
     def print_warning(self, message: str):
         """Print warning message"""
-        print(f"{Colors.BRIGHT_YELLOW}⚠ {message}{Colors.RESET}")
+        print(Colors.wrap(Colors.WARNING_STYLE, f"⚠ {message}"))
+    
+    def _animate(self):
+        """Draw the active animation whenever there is one, for the life of the process"""
+        with self._animation_cond:
+            while True:
+                self._animation_cond.wait_for(lambda: self._animation is not None or self._animation_closed)
+                if self._animation_closed:
+                    return
+                animation = self._animation
+                frames, interval = animation
+                frame = 0
+                while self._animation is animation:
+                    print(f"\r{frames[frame % len(frames)]}", end='', flush=True)
+                    frame += 1
+                    # Wakes early when the animation is stopped
+                    self._animation_cond.wait(interval)
+                self._animation_idle.set()
+    
+    def _start_animation(self, frames: List[str], interval: float):
+        """Hand a sequence of frames to the animation thread"""
+        with self._animation_cond:
+            if self._animation_closed:
+                return
+            self._animation_idle.clear()
+            self._animation = (frames, interval)
+            if self._animation_thread is None:
+                self._animation_thread = threading.Thread(target=self._animate, name="ui-animation", daemon=True)
+                self._animation_thread.start()
+            self._animation_cond.notify()
+    
+    def _stop_animation(self, width: int):
+        """Stop the current animation and blank the line it was drawn on"""
+        with self._animation_cond:
+            if self._animation is None:
+                return
+            self._animation = None
+            self._animation_cond.notify()
+        self._animation_idle.wait(timeout=1)
+        print(f"\r{' ' * width}\r", end='')
     
     def show_loading(self, message: str, task_func):
         """Show loading animation while executing a task"""
         loading_chars = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
-        loading_active = True
-        
-        def loading_animation():
-            i = 0
-            while loading_active:
-                char = loading_chars[i % len(loading_chars)]
-                print(f"\r{Colors.CYAN}{char} {message}...{Colors.RESET}", end='', flush=True)
-                time.sleep(0.1)
-                i += 1
-        
-        # Start loading animation
-        loading_thread = threading.Thread(target=loading_animation)
-        loading_thread.daemon = True
-        loading_thread.start()
+        frames = [f"{Colors.CYAN}{char} {message}...{Colors.RESET}" for char in loading_chars]
         
+        # The task runs on the calling thread so Ctrl+C interrupts it; the
+        # shared animation thread draws the spinner meanwhile
+        self._start_animation(frames, 0.1)
         try:
-            # Execute the task
-            result = task_func()
-            loading_active = False
-            loading_thread.join(timeout=0.5)
-            print(f"\r{' ' * (len(message) + 10)}\r", end='')  # Clear loading line
-            return result
-        except Exception as e:
-            loading_active = False
-            loading_thread.join(timeout=0.5)
-            print(f"\r{' ' * (len(message) + 10)}\r", end='')  # Clear loading line
-            raise e
+            return task_func()
+        finally:
+            self._stop_animation(len(message) + 10)  # Clear loading line
     
     def show_typing_indicator(self):
         """Show typing indicator"""
@@ -182,30 +266,38 @@ Type {Colors.BOLD}/help{Colors.RESET} for available commands.
             return
         
         self.typing_active = True
-        
-        def typing_animation():
-            dots = 0
-            while self.typing_active:
-                dot_str = '.' * (dots % 4)
-                print(f"\r{Colors.DIM}Assistant is typing{dot_str}{' ' * (3 - len(dot_str))}{Colors.RESET}", end='', flush=True)
-                time.sleep(0.5)
-                dots += 1
-        
-        self.typing_thread = threading.Thread(target=typing_animation)
-        self.typing_thread.daemon = True
-        self.typing_thread.start()
+        frames = [
+            f"{Colors.DIM}Assistant is typing{'.' * dots}{' ' * (3 - dots)}{Colors.RESET}"
+            for dots in range(4)
+        ]
+        self._start_animation(frames, 0.5)
     
     def stop_typing_indicator(self):
         """Stop typing indicator"""
         if self.typing_active:
             self.typing_active = False
-            if self.typing_thread:
-                self.typing_thread.join(timeout=1)
-            print(f"\r{' ' * 30}\r", end='')  # Clear typing line
+            self._stop_animation(30)  # Clear typing line
+    
+    def close(self):
+        """Stop any running animation and the thread that draws them"""
+        self.stop_typing_indicator()
+        self._stop_animation(0)
+        
+        with self._animation_cond:
+            self._animation_closed = True
+            self._animation_cond.notify()
+        if self._animation_thread is not None:
+            self._animation_thread.join(timeout=1)
     
     def clear_screen(self):
         """Clear the terminal screen"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        # Erase the display and home the cursor directly; only legacy Windows
+        # consoles without VT support still need a cls subprocess
+        if os.name != 'nt' or os.environ.get('WT_SESSION') or os.environ.get('TERM'):
+            sys.stdout.write("\033[2J\033[H")
+            sys.stdout.flush()
+        else:
+            os.system('cls')
         self.print_header()
     
     def display_conversation_history(self, messages: List):
@@ -214,47 +306,33 @@ Type {Colors.BOLD}/help{Colors.RESET} for available commands.
             self.print_info("No messages in current conversation")
             return
         
-        print(f"\n{Colors.BRIGHT_YELLOW}Conversation History:{Colors.RESET}")
-        print("=" * 50)
+        # Build the whole listing, then write it at once
+        buf = [f"\n{Colors.BRIGHT_YELLOW}Conversation History:{Colors.RESET}\n", "=" * 50, "\n"]
         
         for i, msg in enumerate(messages, 1):
             timestamp = datetime.fromisoformat(msg.timestamp).strftime("%H:%M:%S")
             role_color = Colors.BRIGHT_BLUE if msg.role == "user" else Colors.BRIGHT_GREEN
             role_name = "You" if msg.role == "user" else "Assistant"
             
-            print(f"\n{Colors.BOLD}{i}.{Colors.RESET} {role_color}{role_name}{Colors.RESET} {Colors.DIM}({timestamp}):{Colors.RESET}")
+            buf.append(f"\n{Colors.BOLD}{i}.{Colors.RESET} {role_color}{role_name}{Colors.RESET} {Colors.DIM}({timestamp}):{Colors.RESET}\n")
             
             # Word wrap the content
             wrapped_content = self._wrap_text(msg.content, self.terminal_width - 4)
             for line in wrapped_content.split('\n'):
-                print(f"   {line}")
+                buf.append(f"   {line}\n")
         
-        print("\n" + "=" * 50)
+        buf.append("\n" + "=" * 50 + "\n")
+        sys.stdout.write("".join(buf))
+        sys.stdout.flush()
     
     def _wrap_text(self, text: str, width: int) -> str:
         """Wrap text to specified width"""
         if len(text) <= width:
             return text
         
-        words = text.split()
-        lines = []
-        current_line = []
-        current_length = 0
-        
-        for word in words:
-            if current_length + len(word) + 1 <= width:
-                current_line.append(word)
-                current_length += len(word) + 1
-            else:
-                if current_line:
-                    lines.append(' '.join(current_line))
-                current_line = [word]
-                current_length = len(word)
-        
-        if current_line:
-            lines.append(' '.join(current_line))
-        
-        return '\n'.join(lines)
+        # Collapse whitespace runs (newlines included) to single spaces first
+        self._wrapper.width = max(width, 1)
+        return '\n'.join(self._wrapper.wrap(' '.join(text.split())))
     
     def confirm_action(self, message: str) -> bool:
         """Ask for user confirmation"""
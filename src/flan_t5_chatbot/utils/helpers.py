@@ -2,40 +2,55 @@
 Helper utility functions
 """
 
-import re
+import functools
 import platform
+import sys
 from typing import Any
 
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+# Characters that are not allowed in filenames on common platforms,
+# each mapped to an underscore
+_INVALID_FILENAME_CHARS = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
+
 
 def format_file_size(size_bytes: int) -> str:
     """Format file size in human readable format"""
     if size_bytes == 0:
         return "0B"
     
-    size_names = ["B", "KB", "MB", "GB", "TB"]
-    i = 0
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024.0
-        i += 1
+    # Also covers fractional sizes, whose int() has no bits to shift by
+    if abs(size_bytes) < 1024:
+        return f"{size_bytes:.1f}{SIZE_UNITS[0]}"
+    
+    # Each unit is 2**10 times the previous one, so the bit length picks it
+    i = min((int(size_bytes).bit_length() - 1) // 10, len(SIZE_UNITS) - 1)
     
-    return f"{size_bytes:.1f}{size_names[i]}"
+    return f"{size_bytes / (1 << (10 * i)):.1f}{SIZE_UNITS[i]}"
 
 
 def validate_input(text: str, max_length: int = 1000) -> bool:
     """Validate user input"""
-    if not text or not text.strip():
+    if not text:
         return False
     
+    # Length is O(1), so oversized input is rejected before any scan
     if len(text) > max_length:
         return False
     
-    return True
+    # isspace() stops at the first non-whitespace character and allocates nothing
+    return not text.isspace()
 
 
 def sanitize_filename(filename: str) -> str:
     """Sanitize filename for safe file operations"""
     # Remove or replace invalid characters
-    filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
+    filename = filename.translate(_INVALID_FILENAME_CHARS)
     
     # Remove leading/trailing spaces and dots
     filename = filename.strip(' .')
@@ -47,29 +62,32 @@ def sanitize_filename(filename: str) -> str:
     return filename
 
 
+@functools.lru_cache(maxsize=1)
+def _static_system_info() -> dict:
+    """System details that cannot change while the process runs"""
+    info = {
+        "platform": platform.system(),
+        "platform_version": platform.version(),
+        "architecture": platform.architecture()[0],
+        "processor": platform.processor(),
+        "python_version": platform.python_version(),
+    }
+    if psutil is not None:
+        info["cpu_count"] = psutil.cpu_count()
+    return info
+
+
 def get_system_info() -> dict:
     """Get system information"""
-    try:
-        import psutil
-        
-        return {
-            "platform": platform.system(),
-            "platform_version": platform.version(),
-            "architecture": platform.architecture()[0],
-            "processor": platform.processor(),
-            "python_version": platform.python_version(),
-            "memory_total": psutil.virtual_memory().total,
-            "memory_available": psutil.virtual_memory().available,
-            "cpu_count": psutil.cpu_count()
-        }
-    except ImportError:
-        return {
-            "platform": platform.system(),
-            "platform_version": platform.version(),
-            "architecture": platform.architecture()[0],
-            "processor": platform.processor(),
-            "python_version": platform.python_version(),
-        }
+    info = dict(_static_system_info())
+    
+    if psutil is not None:
+        # One snapshot for both memory figures
+        memory = psutil.virtual_memory()
+        info["memory_total"] = memory.total
+        info["memory_available"] = memory.available
+    
+    return info
 
 
 class ProgressBar:
@@ -79,15 +97,26 @@ class ProgressBar:
         self.total = total
         self.width = width
         self.current = 0
+        # Bars are sliced from these instead of being rebuilt per update
+        self._full = '█' * width
+        self._empty = '-' * width
+        self._last_filled = -1
     
     def update(self, progress: int):
         """Update progress bar"""
         self.current = progress
-        percent = (self.current / self.total) * 100
         filled = int(self.width * self.current // self.total)
-        bar = '█' * filled + '-' * (self.width - filled)
         
-        print(f'\r|{bar}| {percent:.1f}% Complete', end='', flush=True)
+        # Skip redraws that would not change the bar, but always draw completion
+        if filled == self._last_filled and self.current < self.total:
+            return
+        self._last_filled = filled
+        
+        percent = (self.current / self.total) * 100
+        bar = self._full[:filled] + self._empty[:self.width - filled]
+        
+        sys.stdout.write(f'\r|{bar}| {percent:.1f}% Complete')
         
         if self.current >= self.total:
-            print()  # New line when complete
+            sys.stdout.write('\n')  # New line when complete
+        sys.stdout.flush()
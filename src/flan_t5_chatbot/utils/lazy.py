@@ -0,0 +1,24 @@
+"""
+Lazy attribute imports for package namespaces
+"""
+
+import importlib
+import sys
+from typing import Callable, Dict, List, Tuple
+
+
+def lazy_module(module_name: str, lazy_imports: Dict[str, str]) -> Tuple[Callable, Callable]:
+    """Build PEP 562 __getattr__/__dir__ hooks importing names from relative modules on first access"""
+    def __getattr__(name: str):
+        relative_name = lazy_imports.get(name)
+        if relative_name is None:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        
+        value = getattr(importlib.import_module(relative_name, module_name), name)
+        setattr(sys.modules[module_name], name, value)
+        return value
+    
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[module_name])) | set(lazy_imports))
+    
+    return __getattr__, __dir__
@@ -2,12 +2,26 @@
 Logging utilities for FLAN-T5 ChatBot with colored output
 """
 
+import atexit
 import logging
+import queue
 import sys
 import os
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from typing import Optional
 
+# Background thread that writes queued records to the log file
+_listener: Optional[QueueListener] = None
+
+
+def _stop_listener():
+    """Flush queued records and stop the file-writing thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 
 class ColoredFormatter(logging.Formatter):
     """Custom formatter with colors for different log levels"""
@@ -27,6 +41,15 @@ class ColoredFormatter(logging.Formatter):
     def __init__(self, fmt=None, datefmt=None, use_colors=True):
         super().__init__(fmt, datefmt)
         self.use_colors = use_colors and self._supports_color()
+        
+        # Colored labels for the standard levels, built once
+        self._level_cache = {}
+        if self.use_colors:
+            bold, reset = self.COLORS['BOLD'], self.COLORS['RESET']
+            self._level_cache = {
+                level: f"{self.COLORS[level]}{bold}{level}{reset}"
+                for level in ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+            }
     
     def _supports_color(self) -> bool:
         """Check if terminal supports colors"""
@@ -37,18 +60,17 @@ class ColoredFormatter(logging.Formatter):
         )
     
     def format(self, record):
-        if self.use_colors:
-            # Add color to the log level
-            levelname = record.levelname
-            if levelname in self.COLORS:
-                colored_levelname = f"{self.COLORS[levelname]}{self.COLORS['BOLD']}{levelname}{self.COLORS['RESET']}"
-                record.levelname = colored_levelname
-            
-            # Color the logger name
-            if hasattr(record, 'name'):
-                record.name = f"{self.COLORS['DIM']}{record.name}{self.COLORS['RESET']}"
+        if not self.use_colors:
+            return super().format(record)
         
-        return super().format(record)
+        # The same record goes to every handler, so the colored level is
+        # only swapped in for this format call and then put back
+        levelname = record.levelname
+        try:
+            record.levelname = self._level_cache.get(levelname, levelname)
+            return super().format(record)
+        finally:
+            record.levelname = levelname
 
 
 def setup_logging(level: str = "INFO", debug: bool = False, no_color: bool = False) -> logging.Logger:
@@ -70,6 +92,7 @@ def setup_logging(level: str = "INFO", debug: bool = False, no_color: bool = Fal
     
     # Clear existing handlers
     root_logger.handlers.clear()
+    _stop_listener()
     
     # Create formatters
     detailed_formatter = logging.Formatter(
@@ -81,11 +104,20 @@ def setup_logging(level: str = "INFO", debug: bool = False, no_color: bool = Fal
         use_colors=not no_color
     )
     
-    # File handler (no colors for file)
+    # File handler (no colors for file). Records are queued and written by
+    # a listener thread, so callers never block on disk writes
+    global _listener
     file_handler = logging.FileHandler(log_dir / 'chatbot.log')
     file_handler.setLevel(log_level)
     file_handler.setFormatter(detailed_formatter)
-    root_logger.addHandler(file_handler)
+    
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setLevel(log_level)
+    root_logger.addHandler(queue_handler)
+    
+    _listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
     
     # Console handler (with colors if supported)
     if debug:
@@ -101,6 +133,9 @@ def setup_logging(level: str = "INFO", debug: bool = False, no_color: bool = Fal
     return logger
 
 
+atexit.register(_stop_listener)
+
+
 def get_logger(name: str) -> logging.Logger:
     """Get a logger for a specific module"""
     # Remove the package prefix for cleaner names
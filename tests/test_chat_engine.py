@@ -0,0 +1,76 @@
+"""
+Tests for ChatEngine prompt tokenization
+"""
+
+from collections import OrderedDict
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from flan_t5_chatbot.core.chat_engine import ChatEngine
+
+
+class StubTokenizer:
+    """Whitespace tokenizer that assigns ids to words as it sees them"""
+    eos_token_id = 1
+
+    def __init__(self):
+        self.vocab = {}
+
+    def __call__(self, text, add_special_tokens=True):
+        ids = [self.vocab.setdefault(word, len(self.vocab) + 2) for word in text.split()]
+        if add_special_tokens:
+            ids.append(self.eos_token_id)
+        return {'input_ids': ids}
+
+
+def make_engine(max_context_length=512):
+    """ChatEngine with only the state prompt tokenization needs"""
+    engine = ChatEngine.__new__(ChatEngine)
+    engine.tokenizer = StubTokenizer()
+    engine.max_context_length = max_context_length
+    engine._segment_cache = OrderedDict()
+    return engine
+
+
+def tokenize(engine, user_input, context=None):
+    return engine._tokenize_prompt(user_input, context)['input_ids'].tolist()[0]
+
+
+CONTEXT = [
+    {"role": "user", "content": "what is a dividend"},
+    {"role": "assistant", "content": "a share of company profits paid to holders"},
+    {"role": "system", "content": "ignored"},
+    {"role": "user", "content": "how often is it paid"},
+]
+
+
+@pytest.mark.parametrize("context", [None, [], CONTEXT])
+def test_tokenize_prompt_matches_whole_prompt(context):
+    engine = make_engine()
+    prompt = engine._prepare_prompt("and what about stock splits", context)
+
+    assert tokenize(engine, "and what about stock splits", context) == engine.tokenizer(prompt)['input_ids']
+
+
+def test_tokenize_prompt_drops_oldest_turns_first():
+    engine = make_engine()
+    full = tokenize(engine, "next question", CONTEXT)
+    newest = engine._prepare_prompt("next question", CONTEXT[-1:])
+    engine.max_context_length = len(engine.tokenizer(newest)['input_ids'])
+
+    assert tokenize(engine, "next question", CONTEXT) == engine.tokenizer(newest)['input_ids']
+    assert len(full) > engine.max_context_length
+
+
+def test_tokenize_prompt_truncates_long_message():
+    engine = make_engine(max_context_length=16)
+    message = " ".join(f"word{i}" for i in range(50))
+
+    ids = tokenize(engine, message, CONTEXT)
+
+    assert len(ids) == 16
+    assert ids[-2:] == engine.tokenizer("Assistant:")['input_ids']
+    assert ids[:2] == engine.tokenizer("User: word0", add_special_tokens=False)['input_ids']